@@ -0,0 +1,198 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, connection, transaction
+
+from .models import HighScore, ScoreCount, cache_high_score
+
+logger = logging.getLogger(__name__)
+
+# Flush durations kept for the p50/p95 in metrics()
+LATENCY_WINDOW = 200
+
+# Errors caused by a row rather than the database: retrying the same batch
+# can't help, but the other rows in it can still be written
+ROW_ERRORS = (DataError, IntegrityError, OverflowError, ValueError, TypeError)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+class ScoreQueue:
+    """Write-behind queue for submitted scores.
+
+    Requests only append to an in-memory queue and return. A background
+    thread writes the queue out with one ``bulk_create`` per flush, so
+    SQLite's single write lock is taken once per batch rather than once per
+    score. It flushes when ``flush_size`` scores are waiting or the oldest
+    has waited ``flush_interval`` seconds, whichever comes first, writing up
+    to ``max_batch`` at a time so a backlog is caught up in fewer, larger
+    transactions.
+
+    The queue holds at most ``max_depth`` scores; ``put()`` refuses a batch
+    that doesn't fit rather than letting memory grow while the database is
+    slow. A flush that fails is retried ``max_retries`` times, then dropped
+    and logged. A batch that fails because of a bad row is split in half and
+    each half written on its own instead, so only the bad row is dropped.
+    Whatever is queued when the process exits is flushed then.
+
+    Each worker process has its own queue, so a score reaches the database
+    at most ``flush_interval`` seconds (plus the flush) after it was accepted.
+    """
+
+    def __init__(self, flush_size=200, flush_interval=0.5, max_batch=1000, max_depth=10000, max_retries=3):
+        self.flush_size = flush_size
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_depth = max_depth
+        self.max_retries = max_retries
+        self.pending = deque()  # (accepted time, HighScore)
+        self.condition = threading.Condition()
+        self.thread = None  # The writer; it clears this under the lock as it exits
+        self.stopping = False
+        self.exit_registered = False
+        # Metrics
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flush_ms = deque(maxlen=LATENCY_WINDOW)  # Time spent writing each batch
+        self.wait_ms = deque(maxlen=LATENCY_WINDOW)  # Oldest score's time from accepted to committed
+
+    def put(self, entries):
+        # Queue unsaved HighScore objects; returns False if they don't fit
+        now = time.monotonic()
+        with self.condition:
+            if len(self.pending) + len(entries) > self.max_depth:
+                self.rejected += len(entries)
+                return False
+            self.pending.extend((now, entry) for entry in entries)
+            self.accepted += len(entries)
+            if self.thread is None:
+                self.start()
+            # Wake the writer for a full batch, or to time the first score: with
+            # an empty queue it waits without a timeout
+            if len(self.pending) >= self.flush_size or len(self.pending) == len(entries):
+                self.condition.notify()
+        return True
+
+    def start(self):
+        # Called by put() with the condition held, when no writer is running
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name='score-writer', daemon=True)
+        self.thread.start()
+        if not self.exit_registered:
+            atexit.register(self.stop)
+            self.exit_registered = True
+
+    def stop(self):
+        # Flush what is queued, then let the writer thread finish. A put()
+        # after this starts a new writer.
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+            thread = self.thread
+        if thread is not None:
+            thread.join(timeout=10)
+
+    @property
+    def depth(self):
+        return len(self.pending)
+
+    def _run(self):
+        try:
+            while True:
+                with self.condition:
+                    # Wait for a full batch, for the oldest score to come due, or to stop
+                    while not self.stopping:
+                        if len(self.pending) >= self.flush_size:
+                            break
+                        if self.pending:
+                            due = self.pending[0][0] + self.flush_interval - time.monotonic()
+                            if due <= 0:
+                                break
+                            self.condition.wait(due)
+                        else:
+                            self.condition.wait()
+                    if self.stopping and not self.pending:
+                        self.thread = None
+                        return
+                    batch = [self.pending.popleft() for _ in range(min(self.max_batch, len(self.pending)))]
+                self._flush(batch)
+        finally:
+            connection.close()
+
+    def _flush(self, batch):
+        entries = [entry for _, entry in batch]
+        for attempt in range(1, self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                self.write(entries)
+            except ROW_ERRORS:
+                self.failed_flushes += 1
+                if len(batch) == 1:
+                    self.dropped += 1
+                    logger.exception('Dropped queued score %r, which cannot be written', entries[0])
+                    return
+                middle = len(batch) // 2
+                self._flush(batch[:middle])
+                self._flush(batch[middle:])
+                return
+            except Exception:
+                self.failed_flushes += 1
+                logger.exception('Writing %d queued scores failed (attempt %d of %d)',
+                                 len(entries), attempt, self.max_retries)
+                connection.close()  # Start the next attempt on a fresh connection
+                time.sleep(self.flush_interval * attempt)
+                continue
+            finished = time.monotonic()
+            self.flushes += 1
+            self.written += len(entries)
+            self.flush_ms.append((finished - started) * 1000)
+            self.wait_ms.append((finished - batch[0][0]) * 1000)
+            return
+        self.dropped += len(entries)
+        logger.error('Dropped %d queued scores after %d failed attempts', len(entries), self.max_retries)
+
+    def write(self, entries):
+        # One transaction per batch: the rows, their ScoreCounts and, when the
+        # batch holds a new record, the cached high score
+        with transaction.atomic():
+            HighScore.objects.bulk_create(entries)
+            ScoreCount.adjust_many(Counter(entry.score for entry in entries))
+            best = HighScore.objects.best()
+            if best.score == max(entry.score for entry in entries):
+                cache_high_score(best)
+
+    def metrics(self):
+        return {
+            'queue_depth': self.depth,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'written': self.written,
+            'dropped': self.dropped,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'flush_ms_p50': percentile(self.flush_ms, 50),
+            'flush_ms_p95': percentile(self.flush_ms, 95),
+            'flush_wait_ms_p50': percentile(self.wait_ms, 50),
+            'flush_wait_ms_p95': percentile(self.wait_ms, 95),
+        }
+
+
+score_queue = ScoreQueue(
+    flush_size=settings.SCORE_QUEUE_FLUSH_SIZE,
+    flush_interval=settings.SCORE_QUEUE_FLUSH_INTERVAL,
+    max_batch=settings.SCORE_QUEUE_MAX_BATCH,
+    max_depth=settings.SCORE_QUEUE_MAX_DEPTH,
+)
@@ -0,0 +1,124 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connections
+
+from game.ingest import percentile
+from game.models import HighScore
+
+# The two database profiles compared: SQLite's defaults with a connection per
+# request, and settings.py's production profile
+PROFILES = {
+    'basic': {'CONN_MAX_AGE': 0},
+    'production': {'PRAGMAS': settings.SQLITE_PRAGMAS, 'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+}
+
+
+def copy_database(source, path):
+    # The backup API gives a consistent copy even while the site is writing;
+    # the copy starts in rollback-journal mode so the basic profile really
+    # runs without WAL
+    with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+        src.backup(dst)
+        dst.execute('PRAGMA journal_mode = DELETE')
+    src.close()
+    dst.close()
+
+
+class Command(BaseCommand):
+    help = ('Compare score reads and writes per second under the basic and production SQLite '
+            'profiles, on throwaway copies of the database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0, help='Length of each run')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent simulated requests')
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Fraction of requests that submit a score; the rest read the top 10')
+
+    def handle(self, *args, **options):
+        default = connections['default'].settings_dict
+        if default['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('benchdb only benchmarks SQLite databases')
+
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for profile, overrides in PROFILES.items():
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                copy_database(default['NAME'], path)
+                alias = f'benchdb_{profile}'
+                config = {key: value for key, value in default.items() if key != 'PRAGMAS'}
+                config.update(overrides, NAME=path)
+                connections.settings[alias] = config
+                try:
+                    results[profile] = self.run(alias, options)
+                finally:
+                    del connections.settings[alias]
+
+        self.stdout.write(f"{'profile':<12} {'reads/s':>9} {'writes/s':>9} {'locked':>7} "
+                          f"{'read p95 ms':>12} {'write p95 ms':>13}")
+        for profile, r in results.items():
+            self.stdout.write(f"{profile:<12} {r['reads_per_sec']:9.0f} {r['writes_per_sec']:9.0f} "
+                              f"{r['locked']:7d} {r['read_p95_ms']:12.2f} {r['write_p95_ms']:13.2f}")
+        basic, production = results['basic'], results['production']
+        for name in ('reads_per_sec', 'writes_per_sec'):
+            if basic[name]:
+                self.stdout.write(f"{name}: {production[name] / basic[name]:.1f}x")
+
+    def run(self, alias, options):
+        deadline = time.perf_counter() + options['seconds']
+        reads, writes = [], []
+        locked = [0]
+        failures = []  # Errors other than lock contention end the run
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            scores = HighScore.objects.using(alias)
+            read_ms, write_ms, errors = [], [], 0
+            while time.perf_counter() < deadline:
+                write = rng.random() < options['write_ratio']
+                started = time.perf_counter()
+                try:
+                    if write:
+                        scores.create(player_name='benchdb', score=rng.randint(0, 1000))
+                    else:
+                        list(scores.top(10))
+                except Exception as e:
+                    # Only "database is locked" is contention; anything else
+                    # (e.g. "no such table" before migrate) is a failed run
+                    if not (isinstance(e, OperationalError) and 'locked' in str(e)):
+                        with lock:
+                            failures.append(str(e))
+                        break
+                    errors += 1
+                else:
+                    (write_ms if write else read_ms).append((time.perf_counter() - started) * 1000)
+                close_old_connections()  # End of the simulated request
+            connections[alias].close()
+            with lock:
+                reads.extend(read_ms)
+                writes.extend(write_ms)
+                locked[0] += errors
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if failures:
+            raise CommandError(f'benchdb failed: {failures[0]}')
+        return {
+            'reads_per_sec': len(reads) / elapsed,
+            'writes_per_sec': len(writes) / elapsed,
+            'locked': locked[0],
+            'read_p95_ms': percentile(reads, 95),
+            'write_p95_ms': percentile(writes, 95),
+        }
@@ -0,0 +1,123 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.test.utils import override_settings
+
+from game.models import HighScore, ScoreCount
+
+from .benchdb import PROFILES, copy_database
+
+# The load test's records must not reach the site's cache
+PRIVATE_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                             'LOCATION': 'loadtest_scores'}}
+
+
+class Command(BaseCommand):
+    help = ('Submit high scores from hundreds of threads at once, on a throwaway copy of the '
+            'database, and check that only ever-higher records were saved and that ScoreCount '
+            'and the cached high score agree with the table.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=300, help='Concurrent submitters')
+        parser.add_argument('--submissions', type=int, default=5, help='Scores submitted by each thread')
+        parser.add_argument('--profile', choices=PROFILES, default='production',
+                            help='SQLite profile to run under (see benchdb)')
+
+    def handle(self, *args, **options):
+        default = connections['default'].settings_dict
+        if default['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('loadtest_scores only tests SQLite databases')
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES=PRIVATE_CACHE):
+            path = os.path.join(directory, 'loadtest.sqlite3')
+            copy_database(default['NAME'], path)
+            alias = 'loadtest_scores'
+            config = {key: value for key, value in default.items() if key != 'PRAGMAS'}
+            config.update(PROFILES[options['profile']], NAME=path)
+            connections.settings[alias] = config
+            try:
+                problems = self.run(alias, options)
+            finally:
+                connections[alias].close()
+                del connections.settings[alias]
+
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f'{len(problems)} check(s) failed')
+        self.stdout.write('All checks passed')
+
+    def run(self, alias, options):
+        scores = HighScore.objects.using(alias)
+        best = scores.best()
+        base = best.score if best else 0
+        last = scores.order_by('-pk').first()
+        last_pk = last.pk if last else 0
+
+        threads = options['threads']
+        barrier = threading.Barrier(threads)
+        submitted, saved, errors = [], [], []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            mine, records, failures = [], [], []
+            barrier.wait()  # Start everyone together
+            for round in range(options['submissions']):
+                # Each round's scores beat the last round's, so records keep
+                # being set while every thread races for them
+                score = base + round * threads + rng.randint(1, threads)
+                try:
+                    entry = scores.submit(f'loadtest{seed}', score)
+                except OperationalError as e:
+                    failures.append(str(e))
+                    continue
+                mine.append(score)
+                if entry is not None:
+                    records.append(entry)
+            connections[alias].close()
+            with lock:
+                submitted.extend(mine)
+                saved.extend(records)
+                errors.extend(failures)
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        total = threads * options['submissions']
+        self.stdout.write(f'{total} submissions from {threads} threads in {elapsed:.2f}s '
+                          f'({total / elapsed:.0f}/s): {len(saved)} records, {len(errors)} errors')
+
+        problems = [f'submit() failed: {error}' for error in sorted(set(errors))]
+        # Rows inserted by the test, in insert order, must each beat the last
+        inserted = list(scores.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'score'))
+        previous = base if best else -1
+        for pk, score in inserted:
+            if score <= previous:
+                problems.append(f'row {pk} saved {score} after a record of {previous}')
+            previous = max(previous, score)
+        if sorted(pk for pk, _ in inserted) != sorted(entry.pk for entry in saved):
+            problems.append(f'{len(inserted)} rows inserted but submit() returned {len(saved)} records')
+
+        best = scores.best()
+        if submitted and best.score != max(submitted):
+            problems.append(f'best score is {best.score}, highest submitted was {max(submitted)}')
+        table = Counter(scores.values_list('score', flat=True))
+        counted = {row.score: row.count for row in ScoreCount.objects.using(alias).filter(count__gt=0)}
+        if counted != dict(table):
+            problems.append('ScoreCount does not match the HighScore table')
+        cached = cache.get('game:high_score')
+        if saved and (cached is None or cached.pk != best.pk):
+            problems.append(f'cached high score is {cached}, database best is {best}')
+        return problems
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:04
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_scores(apps, schema_editor):
+    HighScore = apps.get_model('game', 'HighScore')
+    ScoreCount = apps.get_model('game', 'ScoreCount')
+    counts = HighScore.objects.values('score').annotate(count=Count('id')).order_by()
+    ScoreCount.objects.bulk_create(ScoreCount(score=row['score'], count=row['count']) for row in counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField(unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='highscore',
+            index=models.Index(fields=['-score', 'date'], name='highscore_score_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='highscore',
+            index=models.Index(fields=['player_name', '-score', 'date'], name='highscore_player_score_idx'),
+        ),
+        migrations.RunPython(count_scores, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,248 @@
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import NotSupportedError, connections, models, router, transaction
+from django.db.models import F, Sum
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+# Leaderboard order: highest score first, earlier date first on a tie
+LEADERBOARD_ORDER = ('-score', 'date')
+
+# Cache entry for the current high score, read by every page load
+HIGH_SCORE_CACHE_KEY = 'game:high_score'
+MISSING = object()
+
+
+def cache_high_score(entry):
+    # Write-through: called with the new record as soon as it is saved
+    cache.set(HIGH_SCORE_CACHE_KEY, entry, settings.HIGH_SCORE_CACHE_TIMEOUT)
+
+
+def forget_high_score():
+    cache.delete(HIGH_SCORE_CACHE_KEY)
+
+
+class HighScoreQuerySet(models.QuerySet):
+    """Leaderboard queries, each an index seek rather than a table scan.
+
+    Ranks are competition ranks ("1224"): one more than the number of scores
+    strictly higher, so tied scores share a rank. They are summed from
+    ScoreCount, so a rank costs one row per distinct higher score however
+    many rows the table has. A player's rank is the rank of their best score.
+    """
+
+    def best(self):
+        # The top score, or None
+        return self.order_by(*LEADERBOARD_ORDER).first()
+
+    def cached_best(self):
+        # best() from the cache, falling back to the database on a miss. An
+        # empty table is cached as None too, so it doesn't query every time.
+        # The miss is filled with add(), never set(): a record written through
+        # while best() was running is newer than what it read.
+        entry = cache.get(HIGH_SCORE_CACHE_KEY, MISSING)
+        if entry is MISSING:
+            entry = self.best()
+            cache.add(HIGH_SCORE_CACHE_KEY, entry, settings.HIGH_SCORE_CACHE_TIMEOUT)
+        return entry
+
+    def submit(self, player_name, score):
+        """Save ``score`` only if it beats every score so far. SQLite only.
+
+        The check and the insert are a single ``INSERT ... SELECT ... WHERE NOT
+        EXISTS`` statement. SQLite takes its write lock before running it, so
+        concurrent submissions are serialized and only a score that is still
+        the highest gets in. Other databases would need a table lock for that
+        (a row lock does nothing on an empty table) and don't all have
+        ``lastrowid``, so they raise NotSupportedError.
+
+        Returns the new HighScore, or None if the score wasn't a record. The
+        ScoreCount and the cache are updated in the same transaction, while
+        the lock is still held, so the cache always ends with the newest record.
+        ``python manage.py loadtest_scores`` checks this under concurrency.
+        """
+        connection = connections[self.db]
+        if connection.vendor != 'sqlite':
+            raise NotSupportedError('HighScore.objects.submit() relies on SQLite locking')
+        meta = self.model._meta
+        table = connection.ops.quote_name(meta.db_table)
+        date = timezone.now()
+        with transaction.atomic(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} (player_name, score, date) SELECT %s, %s, %s '
+                    f'WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE score >= %s)',
+                    [player_name, score, meta.get_field('date').get_db_prep_value(date, connection), score],
+                )
+                if cursor.rowcount != 1:
+                    return None
+                pk = cursor.lastrowid
+            entry = self.model(pk=pk, player_name=player_name, score=score, date=date)
+            # The raw insert skips the post_save signal, so count it here
+            ScoreCount.adjust(score, 1, using=self.db)
+            cache_high_score(entry)
+        return entry
+
+    def top(self, n=10):
+        return self.order_by(*LEADERBOARD_ORDER)[:n]
+
+    def best_for(self, player_name):
+        return self.filter(player_name=player_name).order_by(*LEADERBOARD_ORDER).first()
+
+    def rank_of(self, entry):
+        return ScoreCount.rank_of_score(entry.score)
+
+    def around(self, entry, n=5):
+        # Up to ``n`` scores either side of ``entry``, in leaderboard order.
+        # Ties with ``entry`` come first on each side, then strictly higher or
+        # lower scores; every query walks the (score, date) index in order.
+        above = list(self.filter(score=entry.score, date__lt=entry.date).order_by('-date')[:n])
+        if len(above) < n:
+            above += self.filter(score__gt=entry.score).order_by('score', '-date')[:n - len(above)]
+        below = list(self.filter(score=entry.score, date__gt=entry.date).order_by('date')[:n])
+        if len(below) < n:
+            below += self.filter(score__lt=entry.score).order_by(*LEADERBOARD_ORDER)[:n - len(below)]
+        return above[::-1] + [entry] + below
+
 
 class HighScore(models.Model):
     player_name = models.CharField(max_length=100, blank=True, null=True)  # Optional field for player name
     score = models.IntegerField(default=0)
     date = models.DateTimeField(auto_now_add=True)
 
+    objects = HighScoreQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Top-N and around-me walk this index
+            models.Index(fields=['-score', 'date'], name='highscore_score_date_idx'),
+            # A player's best score
+            models.Index(fields=['player_name', '-score', 'date'], name='highscore_player_score_idx'),
+        ]
+
     def __str__(self):
         return f'{self.player_name or "Anonymous"} - {self.score}'
+
+    def save(self, *args, **kwargs):
+        # One transaction for the pre_save read of the old score, the row and
+        # the post_save ScoreCount update, so a failure part way rolls them all
+        # back. (delete() already runs its signals in a transaction.) On SQLite
+        # an edit reads before it writes, so under write contention it can fail
+        # at once with "database is locked", but it never leaves the counts
+        # out of step with the table.
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class ScoreCount(models.Model):
+    """How many HighScore rows have each score, for ranking.
+
+    Kept in step with HighScore by the signal handlers below. Writes that skip
+    signals (``QuerySet.update()``, ``bulk_create()``) must call ``adjust()``
+    or ``adjust_many()`` themselves.
+    """
+
+    score = models.IntegerField(unique=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.score}: {self.count}'
+
+    @classmethod
+    def adjust(cls, score, delta, using=None):
+        # A single upsert, so the transaction never reads before it writes
+        # (on SQLite that upgrade fails at once with "database is locked")
+        cls.adjust_many({score: delta}, using=using)
+
+    @classmethod
+    def adjust_many(cls, deltas, using=None, chunk=400):
+        # adjust() for a whole {score: delta} batch. Increments are upserts of
+        # ``chunk`` scores per statement (each takes two of SQLite's 999
+        # variables); decrements always have a row, and the CHECK on count
+        # would reject them as upsert values, so they are plain updates.
+        using = using or cls.objects.db
+        connection = connections[using]
+        table = connection.ops.quote_name(cls._meta.db_table)
+        increments = [(score, delta) for score, delta in deltas.items() if delta > 0]
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            for i in range(0, len(increments), chunk):
+                rows = increments[i:i + chunk]
+                cursor.execute(
+                    f'INSERT INTO {table} (score, count) VALUES {", ".join(["(%s, %s)"] * len(rows))} '
+                    f'ON CONFLICT (score) DO UPDATE SET count = {table}.count + excluded.count',
+                    [value for row in rows for value in row],
+                )
+            for score, delta in deltas.items():
+                if delta < 0:
+                    cls.objects.using(using).filter(score=score).update(count=F('count') + delta)
+
+    @classmethod
+    def rank_of_score(cls, score):
+        ahead = cls.objects.filter(score__gt=score).aggregate(total=Sum('count'))['total']
+        return (ahead or 0) + 1
+
+    @classmethod
+    def ranks_of_scores(cls, scores):
+        # {score: rank} for several scores from one pass over the counts
+        pending = sorted(set(scores), reverse=True)
+        if not pending:
+            return {}
+        ranks = {}
+        ahead = 0
+        counts = cls.objects.filter(score__gte=pending[-1]).order_by('-score').values_list('score', 'count')
+        for score, count in counts:
+            while pending and pending[0] >= score:
+                ranks[pending.pop(0)] = ahead + 1
+            ahead += count
+        for score in pending:
+            ranks[score] = ahead + 1
+        return ranks
+
+
+@receiver(pre_save, sender=HighScore)
+def remember_old_score(sender, instance, using, **kwargs):
+    # Edits (e.g. in the admin) move the row from its old score's count. Runs
+    # in HighScore.save()'s transaction, together with count_saved_score.
+    instance._old_score = None
+    if instance.pk is not None and not instance._state.adding:
+        instance._old_score = (HighScore.objects.using(using).filter(pk=instance.pk)
+                               .values_list('score', flat=True).first())
+
+
+@receiver(post_save, sender=HighScore)
+def count_saved_score(sender, instance, created, using, **kwargs):
+    old_score = getattr(instance, '_old_score', None)
+    if created:
+        ScoreCount.adjust(instance.score, 1, using=using)
+    elif old_score is not None and old_score != instance.score:
+        ScoreCount.adjust_many({old_score: -1, instance.score: 1}, using=using)
+
+
+@receiver(post_delete, sender=HighScore)
+def count_deleted_score(sender, instance, using, **kwargs):
+    ScoreCount.adjust(instance.score, -1, using=using)
+
+
+@receiver(post_save, sender=HighScore)
+@receiver(post_delete, sender=HighScore)
+def forget_changed_high_score(sender, instance, using, **kwargs):
+    # submit() and the score queue write new records through themselves, but
+    # they skip signals. Any save or delete through the ORM (the admin, the
+    # shell, benchdb) may change which row is best, so drop the cached one.
+    # Dropping it once the change is committed keeps cached_best() from
+    # re-caching the old best in between.
+    transaction.on_commit(forget_high_score, using=using)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    # Run the PRAGMAS from the database's settings on every new connection
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -91,30 +91,54 @@ function addPipe() {
     createPipe();
 }
 
+// Scores not yet accepted by the server, sent again with the next one. Kept
+// in localStorage because restarting reloads the page.
+function loadUnsentScores() {
+    try {
+        return JSON.parse(localStorage.getItem('unsentScores')) || [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function saveUnsentScores(scores) {
+    try {
+        localStorage.setItem('unsentScores', JSON.stringify(scores.slice(-100)));
+    } catch (error) {
+        // Storage disabled or full: these scores are lost
+    }
+}
+
 function handleGameOver() {
     gameOver = true;
     gameOverScreen.style.display = 'block';
 
-    const formData = new FormData();
-    formData.append('score', score);
-    formData.append('player_name', 'Player');
+    // Queued on the server and written in batches, so a game over never
+    // waits for the database
+    const scores = loadUnsentScores().concat([{score: score, player_name: 'Player'}]);
+    saveUnsentScores([]);
 
-    fetch('/update_score/', {
+    fetch('/scores/', {
         method: 'POST',
-        body: formData,
+        body: JSON.stringify({scores: scores}),
         headers: {
+            'Content-Type': 'application/json',
             'X-CSRFToken': getCookie('csrftoken'),
             'Accept': 'application/json'
         }
     })
     .then(response => {
-        if (!response.ok) {
-            throw new Error('Network response was not ok');
+        if (response.status === 503) {
+            throw new Error('Score queue is full');
         }
         return response.json();
     })
     .then(data => console.log(data))
-    .catch(error => console.error('There was a problem with the fetch operation:', error));
+    .catch(error => {
+        // Server busy or unreachable: send these along with the next score
+        saveUnsentScores(scores.concat(loadUnsentScores()));
+        console.error('There was a problem with the fetch operation:', error);
+    });
 }
 
 function getCookie(name) {
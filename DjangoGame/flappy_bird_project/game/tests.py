@@ -1,3 +1,302 @@
-from django.test import TestCase
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .ingest import ScoreQueue, score_queue
+from .models import HIGH_SCORE_CACHE_KEY, LEADERBOARD_ORDER, HighScore, HighScoreQuerySet, ScoreCount
+
+
+def counts():
+    return {row.score: row.count for row in ScoreCount.objects.all() if row.count}
+
+
+def brute_counts():
+    result = {}
+    for score in HighScore.objects.values_list('score', flat=True):
+        result[score] = result.get(score, 0) + 1
+    return result
+
+
+def make_scores(rng, n, high=30):
+    # ``n`` scores with plenty of ties, each a second apart so the
+    # leaderboard order is total
+    start = timezone.now()
+    entries = []
+    for offset in rng.sample(range(100 * n), n):
+        entry = HighScore.objects.create(player_name=f'p{rng.randrange(n // 3 + 1)}', score=rng.randrange(high))
+        entry.date = start + timedelta(seconds=offset)
+        entry.save()
+        entries.append(entry)
+    return entries
+
+
+class ScoreCountSignalTests(TestCase):
+    def test_create_edit_delete(self):
+        a = HighScore.objects.create(player_name='a', score=10)
+        b = HighScore.objects.create(player_name='b', score=10)
+        HighScore.objects.create(player_name='c', score=20)
+        self.assertEqual(counts(), {10: 2, 20: 1})
+
+        a.score = 20
+        a.save()
+        self.assertEqual(counts(), {10: 1, 20: 2})
+
+        b.player_name = 'bee'  # Same score: nothing to move
+        b.save()
+        self.assertEqual(counts(), {10: 1, 20: 2})
+
+        a.delete()
+        b.delete()
+        self.assertEqual(counts(), {20: 1})
+
+    def test_random_edits_match_table(self):
+        rng = random.Random(1)
+        entries = make_scores(rng, 60)
+        for _ in range(100):
+            entry = rng.choice(entries)
+            if rng.random() < 0.2:
+                entry.delete()
+                entries.remove(entry)
+            else:
+                entry.score = rng.randrange(30)
+                entry.save()
+            self.assertEqual(counts(), brute_counts())
+
+    def test_adjust_many_mixed_deltas(self):
+        # Decrements to zero sit next to increments and new scores in one call
+        for score in (10, 10, 20):
+            HighScore.objects.create(score=score)
+        ScoreCount.adjust_many({10: -2, 20: 3, 30: 1})
+        self.assertEqual(counts(), {20: 4, 30: 1})
+        ScoreCount.adjust_many({score: 1 for score in range(1000)}, chunk=7)
+        self.assertEqual(counts()[999], 1)
+        self.assertEqual(counts()[20], 5)
+
+    def test_failed_count_update_rolls_back_edit(self):
+        entry = HighScore.objects.create(player_name='a', score=10)
+        entry.score = 20
+        with mock.patch.object(ScoreCount, 'adjust_many', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                entry.save()
+        self.assertEqual(HighScore.objects.get(pk=entry.pk).score, 10)
+        self.assertEqual(counts(), brute_counts())
+
+    def test_submit_counts_its_insert(self):
+        HighScore.objects.submit('a', 5)
+        HighScore.objects.submit('b', 3)  # Not a record, not saved
+        HighScore.objects.submit('c', 9)
+        self.assertEqual(counts(), {5: 1, 9: 1})
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.entries = make_scores(random.Random(2), 80)
+        self.board = list(HighScore.objects.order_by(*LEADERBOARD_ORDER))
+
+    def brute_rank(self, score):
+        # Competition rank: one more than the number of strictly higher scores
+        return 1 + sum(1 for e in self.board if e.score > score)
+
+    def test_ranks_of_scores(self):
+        scores = [e.score for e in self.board] + [-1, 15, 1000]
+        ranks = ScoreCount.ranks_of_scores(scores)
+        self.assertEqual(ranks, {score: self.brute_rank(score) for score in scores})
+        self.assertEqual(ScoreCount.ranks_of_scores([]), {})
+
+    def test_rank_of(self):
+        for entry in self.board:
+            self.assertEqual(HighScore.objects.rank_of(entry), self.brute_rank(entry.score))
+
+    def test_tied_scores_share_a_rank(self):
+        for a, b in zip(self.board, self.board[1:]):
+            if a.score == b.score:
+                self.assertEqual(HighScore.objects.rank_of(a), HighScore.objects.rank_of(b))
+
+    def test_around_matches_leaderboard_order(self):
+        for n in (0, 1, 3, 5):
+            for i, entry in enumerate(self.board):
+                nearby = HighScore.objects.around(entry, n)
+                self.assertEqual([e.pk for e in nearby],
+                                 [e.pk for e in self.board[max(i - n, 0):i + n + 1]])
+
+    def test_top_and_best_for(self):
+        self.assertEqual(list(HighScore.objects.top(10)), self.board[:10])
+        self.assertEqual(HighScore.objects.best(), self.board[0])
+        for player_name in {e.player_name for e in self.board}:
+            best = next(e for e in self.board if e.player_name == player_name)
+            self.assertEqual(HighScore.objects.best_for(player_name), best)
+        self.assertIsNone(HighScore.objects.best_for('nobody'))
+
+
+class HighScoreCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_miss_does_not_overwrite_newer_record(self):
+        HighScore.objects.submit('old', 5)
+        cache.clear()
+        best = HighScoreQuerySet.best
+
+        def best_then_new_record(queryset):
+            # A record is submitted while the miss is being filled
+            entry = best(queryset)
+            HighScore.objects.submit('new', 9)
+            return entry
+
+        with mock.patch.object(HighScoreQuerySet, 'best', best_then_new_record):
+            self.assertEqual(HighScore.objects.cached_best().score, 5)
+        self.assertEqual(cache.get(HIGH_SCORE_CACHE_KEY).score, 9)
+        self.assertEqual(HighScore.objects.cached_best().score, 9)
+
+    def test_orm_writes_reach_the_cache(self):
+        self.assertIsNone(HighScore.objects.cached_best())
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = HighScore.objects.create(player_name='shell', score=7)
+        self.assertEqual(HighScore.objects.cached_best(), entry)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.score = 3
+            entry.save()
+        self.assertEqual(HighScore.objects.cached_best().score, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+        self.assertIsNone(HighScore.objects.cached_best())
+
+    def test_forgotten_only_once_committed(self):
+        HighScore.objects.submit('a', 5)
+        with self.captureOnCommitCallbacks() as callbacks:
+            HighScore.objects.create(player_name='b', score=8)
+            self.assertEqual(HighScore.objects.cached_best().score, 5)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(HighScore.objects.cached_best().score, 8)
+
+
+class ScoreQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.queue = ScoreQueue(flush_interval=0)
+
+    def flush(self, scores):
+        now = time.monotonic()
+        self.queue._flush([(now, HighScore(player_name=f'p{score}', score=score)) for score in scores])
+
+    def test_counts_match_table_after_flushes(self):
+        rng = random.Random(3)
+        HighScore.objects.create(player_name='before', score=10)
+        for _ in range(5):
+            self.flush([rng.randrange(50) for _ in range(rng.randrange(1, 300))])
+            self.assertEqual(counts(), brute_counts())
+        self.assertEqual(self.queue.dropped, 0)
+        self.assertEqual(self.queue.written, HighScore.objects.count() - 1)
+
+    def test_bad_row_only_drops_itself(self):
+        scores = list(range(1, 400))
+        scores.insert(350, 2 ** 70)  # Past the first bulk_create statement
+        with self.assertLogs('game.ingest', 'ERROR'):
+            self.flush(scores)
+        self.assertEqual(sorted(HighScore.objects.values_list('score', flat=True)), list(range(1, 400)))
+        self.assertEqual((self.queue.written, self.queue.dropped), (399, 1))
+        self.assertEqual(counts(), brute_counts())
+        self.assertEqual(cache.get(HIGH_SCORE_CACHE_KEY).score, 399)
+
+
+class ScoreEndpointTests(TransactionTestCase):
+    # The real path: /scores/ queues, the writer thread flushes, metrics report it
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client(HTTP_HOST='127.0.0.1')
+        self.addCleanup(score_queue.stop)
+
+    def post(self, scores):
+        body = json.dumps({'scores': [{'score': score, 'player_name': 'p'} for score in scores]})
+        return self.client.post('/scores/', body, content_type='application/json')
+
+    def wait_for_rows(self, n):
+        deadline = time.monotonic() + 10
+        while HighScore.objects.count() < n:
+            self.assertLess(time.monotonic(), deadline, 'queued scores were never written')
+            time.sleep(0.05)
+
+    def test_scores_are_written_in_the_background(self):
+        written = score_queue.written
+        response = self.post([5, 9, 9])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['accepted'], 3)
+        self.wait_for_rows(3)
+        score_queue.stop()  # Waits for the flush to finish
+
+        self.assertEqual(sorted(HighScore.objects.values_list('score', flat=True)), [5, 9, 9])
+        self.assertEqual(counts(), {5: 1, 9: 2})
+        self.assertEqual(HighScore.objects.cached_best().score, 9)
+        metrics = self.client.get('/scores/metrics/').json()
+        self.assertEqual(metrics['written'] - written, 3)
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertGreater(metrics['flush_ms_p50'], 0)
+
+    def test_writer_restarts_after_stop(self):
+        self.assertEqual(self.post([1]).status_code, 202)
+        self.wait_for_rows(1)
+        score_queue.stop()
+        self.assertIsNone(score_queue.thread)
+        for n in range(2, 5):  # The writer keeps running from here on
+            self.assertEqual(self.post([n]).status_code, 202)
+            self.wait_for_rows(n)
+        score_queue.stop()
+        self.assertEqual(score_queue.exit_registered, True)
+
+
+class ScoreRangeTests(TestCase):
+    def setUp(self):
+        self.client = Client(HTTP_HOST='127.0.0.1')
+
+    def test_submit_scores_rejects_out_of_range(self):
+        for score in (-1, 2 ** 31, 2 ** 70):
+            body = json.dumps({'scores': [{'score': 5}, {'score': score}]})
+            response = self.client.post('/scores/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_update_score_rejects_out_of_range(self):
+        for score in (-1, 2 ** 31, 2 ** 70):
+            response = self.client.post('/update_score/', {'score': score})
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/update_score/', {'score': 2 ** 31 - 1})
+        self.assertEqual(response.json()['high_score'], True)
+
+
+class SqlitePragmaTests(TestCase):
+    def pragmas(self, **overrides):
+        # PRAGMA values seen by a fresh connection to a new database file
+        with tempfile.TemporaryDirectory() as directory:
+            config = {key: value for key, value in connections['default'].settings_dict.items() if key != 'PRAGMAS'}
+            config.update(overrides, NAME=os.path.join(directory, 'pragmas.sqlite3'))
+            new = connections['default'].__class__(config, alias='pragma_test')
+            try:
+                with new.cursor() as cursor:
+                    values = {}
+                    for name in settings.SQLITE_PRAGMAS:
+                        cursor.execute(f'PRAGMA {name}')
+                        values[name] = cursor.fetchone()[0]
+            finally:
+                new.close()
+        return values
+
+    def test_production_pragmas_set_on_connect(self):
+        self.assertEqual(self.pragmas(PRAGMAS=settings.SQLITE_PRAGMAS), {
+            'journal_mode': 'wal', 'synchronous': 1, 'mmap_size': 256 * 1024 * 1024, 'busy_timeout': 5000,
+        })
+
+    def test_basic_profile_leaves_defaults(self):
+        self.assertEqual(self.pragmas()['journal_mode'], 'delete')
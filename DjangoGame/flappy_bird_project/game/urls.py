@@ -6,6 +6,9 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('game/', views.game_view, name='game'),
     path('update_score/', views.update_score, name='update_score'),
+    path('leaderboard/', views.leaderboard_view, name='leaderboard'),
+    path('scores/', views.submit_scores, name='submit_scores'),
+    path('scores/metrics/', views.score_queue_metrics, name='score_queue_metrics'),
     path('', views.high_score_view, name='high_score'),
 ]
 
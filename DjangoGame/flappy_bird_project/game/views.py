@@ -1,9 +1,18 @@
+import json
+
 from django.shortcuts import render
 from django.http import JsonResponse
-from .models import HighScore
+from .ingest import score_queue
+from .models import HighScore, ScoreCount
+
+# Most scores accepted by one submit_scores request
+MAX_BATCH = 500
+
+# Highest score HighScore.score (an IntegerField) can hold
+MAX_SCORE = 2147483647
 
 def game_view(request):
-    high_score = HighScore.objects.order_by('-score').first()  # Get the highest score
+    high_score = HighScore.objects.cached_best()  # Get the highest score
     context = {
         'high_score': high_score.score if high_score else 0,
     }
@@ -11,17 +20,87 @@ def game_view(request):
 
 def update_score(request):
     if request.method == "POST":
-        score = int(request.POST.get('score'))
+        try:
+            score = int(request.POST.get('score'))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Invalid request'}, status=400)
+        if not 0 <= score <= MAX_SCORE:
+            return JsonResponse({'error': 'Invalid request'}, status=400)
         player_name = request.POST.get('player_name', 'Anonymous')
 
-        # Check if the new score is a high score
-        high_score = HighScore.objects.order_by('-score').first()
-        if not high_score or score > high_score.score:
-            HighScore.objects.create(player_name=player_name, score=score)
+        # Saved only if it is a new high score, checked and written atomically
+        high_score = HighScore.objects.submit(player_name, score)
 
-        return JsonResponse({'message': 'Score updated successfully'})
+        return JsonResponse({'message': 'Score updated successfully', 'high_score': high_score is not None})
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 def high_score_view(request):
-    high_score = HighScore.objects.order_by('-score').first()  # Get the highest score
+    high_score = HighScore.objects.cached_best()  # Get the highest score
     return render(request, 'game/high_score.html', {'high_score': high_score})
+
+def leaderboard_entry(entry, rank):
+    return {
+        'rank': rank,
+        'player_name': entry.player_name or 'Anonymous',
+        'score': entry.score,
+        'date': entry.date.isoformat(),
+    }
+
+def leaderboard_view(request):
+    # Top scores (?limit=10), and with ?player=<name> that player's rank and
+    # the scores around theirs (?around=5 either side)
+    try:
+        limit = max(min(int(request.GET.get('limit', 10)), 100), 1)
+        around = max(min(int(request.GET.get('around', 5)), 50), 0)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    top = list(HighScore.objects.top(limit))
+    ranks = ScoreCount.ranks_of_scores(e.score for e in top)
+    data = {'top': [leaderboard_entry(entry, ranks[entry.score]) for entry in top]}
+
+    player_name = request.GET.get('player')
+    if player_name:
+        entry = HighScore.objects.best_for(player_name)
+        if entry is None:
+            data['player'] = None
+        else:
+            nearby = HighScore.objects.around(entry, around)
+            ranks = ScoreCount.ranks_of_scores(e.score for e in nearby)
+            data['player'] = {
+                'rank': ranks[entry.score],
+                'score': entry.score,
+                'around': [leaderboard_entry(e, ranks[e.score]) for e in nearby],
+            }
+    return JsonResponse(data)
+
+def parse_scores(body):
+    # HighScore objects from {"scores": [{"score": 12, "player_name": "..."}, ...]}
+    scores = json.loads(body)['scores']
+    if not isinstance(scores, list) or not 0 < len(scores) <= MAX_BATCH:
+        raise ValueError('scores must be a list of 1 to %d entries' % MAX_BATCH)
+    entries = []
+    for item in scores:
+        score = item['score']
+        player_name = item.get('player_name') or 'Anonymous'
+        if (type(score) is not int or not 0 <= score <= MAX_SCORE
+                or not isinstance(player_name, str) or len(player_name) > 100):
+            raise ValueError('bad score entry')
+        entries.append(HighScore(player_name=player_name, score=score))
+    return entries
+
+def submit_scores(request):
+    # Queue a batch of scores to be written in the background; answers at once
+    if request.method != "POST":
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    try:
+        entries = parse_scores(request.body)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    if not score_queue.put(entries):
+        return JsonResponse({'error': 'Too many queued scores, try again later',
+                             'queue_depth': score_queue.depth}, status=503)
+    return JsonResponse({'accepted': len(entries), 'queue_depth': score_queue.depth}, status=202)
+
+def score_queue_metrics(request):
+    return JsonResponse(score_queue.metrics())
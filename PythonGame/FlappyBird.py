@@ -1,28 +1,40 @@
+import argparse
 import pygame
 import sys
-import random
-import pyaudio
-import numpy as np
-import cv2  # Import OpenCV for camera feed
+from audio_capture import AUDIO_SOURCE_HELP, MicCapture, audio_source
+from camera_capture import CAMERA_SOURCE_HELP, CameraCapture, CameraSurface, frame_source
+from flappy_sim import FlappySim
+from frame_timer import FrameTimer, ProfilerOverlay
+from fixed_timestep import FixedTimestep, lerp
+from dirty_renderer import DirtyRenderer
+from text_cache import text_cache
+
+ip_webcam_url = 'http://192.168.0.104:8080/video'  # Replace with your actual URL, or pass --camera
+
+# Input sources, e.g. --audio clip.wav --camera 0 to play without a phone or a mic
+parser = argparse.ArgumentParser(description='Flappy Bird that flaps when you make a sound.')
+parser.add_argument('--audio', default='mic', type=audio_source, help=AUDIO_SOURCE_HELP)
+parser.add_argument('--camera', default=ip_webcam_url, type=frame_source, help=CAMERA_SOURCE_HELP)
+args = parser.parse_args()
 
 # Initialize Pygame
 pygame.init()
 
-# Initialize PyAudio
-audio = pyaudio.PyAudio()
-stream = audio.open(format=pyaudio.paInt16, channels=1, rate=44100, input=True, frames_per_buffer=1024)
-
-# Initialize OpenCV camera
-ip_webcam_url = 'http://192.168.0.104:8080/video'  # Replace with your actual URL
-
-camera = cv2.VideoCapture(ip_webcam_url)
-# camera = cv2.VideoCapture(0)
+# Start audio capture (the device is opened in the background)
+mic = MicCapture(args.audio).start()
 
 # Screen dimensions (Fullscreen)
 screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
 WIDTH, HEIGHT = screen.get_size()
 
+# Decode camera frames on a background thread. Lower the decode size on slow
+# machines; frames are scaled up to the screen when they're blitted.
+camera_decode_size = (WIDTH, HEIGHT)
+camera_stale_after = 5.0  # Seconds to keep showing the last frame after the stream drops
+camera_capture = CameraCapture(args.camera, camera_decode_size).start()  # Connects in the background
+
 # Colors
+BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 YELLOW = (255, 255, 0)
 PIPE_COLOR = (0, 255, 0)
@@ -40,133 +52,138 @@ pipe_gap = 200
 pipe_distance = 600
 pipe_speed = 5
 
-# Initialize game state
-def reset_game():
-    global bird_y, bird_speed_y, pipes, score, bird_rect
-
-    bird_y = HEIGHT // 2
-    bird_speed_y = 0
-    bird_rect = pygame.Rect(bird_x, bird_y, bird_size, bird_size)
-
-    pipes = []
-    for i in range(3):
-        pipe_x = WIDTH + i * pipe_distance
-        pipe_height = random.randint(100, HEIGHT - pipe_gap - 100)
-        pipes.append((pipe_x, pipe_height))
-
-    score = 0
-
-def create_pipe(pipe_x):
-    pipe_height = random.randint(100, HEIGHT - pipe_gap - 100)
-    return (pipe_x, pipe_height)
-
-def get_sound_intensity():
-    data = np.frombuffer(stream.read(1024), dtype=np.int16)
-    return np.max(np.abs(data))
-
-def is_sound_detected(threshold=1000):
-    return get_sound_intensity() > threshold
+tick_rate = 60  # Physics ticks per second, independent of the render frame rate
+print_timings = False  # Print a per-frame timing breakdown every 300 frames
+profile_trace = None  # Path of a JSONL file to write per-frame timings to, e.g. 'trace.jsonl'
+# Press F3 in game for the profiler overlay (FPS and p50/p95/p99 per phase)
+dirty_rendering = False  # Redraw only changed areas while there's no camera backdrop
 
-# Function to convert OpenCV frame to Pygame surface
-def get_camera_frame():
-    ret, frame = camera.read()
-    if not ret:
-        return None
-
-    # Flip the frame so it's not mirrored
-    frame = cv2.flip(frame, 1)
-
-    # Resize the frame to fit the screen
-    frame = cv2.resize(frame, (WIDTH, HEIGHT))
+# Physics, pipes, collision and scoring live in the headless simulation
+sim = FlappySim(WIDTH, HEIGHT, bird_size=bird_size, bird_x=bird_x, gravity=gravity,
+                jump_strength=jump_strength, pipe_width=pipe_width, pipe_gap=pipe_gap,
+                pipe_distance=pipe_distance, pipe_speed=pipe_speed)
+bird_rect = pygame.Rect(bird_x, bird_y, bird_size, bird_size)
 
-    # Convert the frame to RGB (OpenCV uses BGR by default)
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+# One persistent (top, bottom) rect pair per pipe, updated in place for drawing
+pipe_rects = [(pygame.Rect(0, 0, pipe_width, 0), pygame.Rect(0, 0, pipe_width, 0)) for _ in sim.pipes]
 
-    # Convert the frame to a Pygame surface
-    frame_surface = pygame.surfarray.make_surface(frame_rgb.transpose(1, 0, 2))
-    return frame_surface
+# Bird y before the most recent tick, for render interpolation
+previous_bird_y = sim.bird_y
 
 # Initialize game state
-pipes = []
-reset_game()
+def reset_game():
+    global previous_bird_y
+    sim.reset()
+    previous_bird_y = sim.bird_y
+
+# Sound onsets already turned into flaps
+onsets_seen = 0
+
+def is_sound_detected():
+    # True once for each new sound. The detector follows the room's noise
+    # floor and debounces, so background noise or one long shout doesn't
+    # keep flapping. Never waits on the audio device.
+    global onsets_seen
+    count = mic.onset_count
+    detected = count != onsets_seen
+    onsets_seen = count
+    return detected
+
+def quit_game():
+    mic.stop()
+    camera_capture.stop()
+    if print_timings:
+        print(f"Camera: {camera_surface.bytes_per_frame():.0f} bytes allocated per frame")
+    timer.close()
+    pygame.quit()
+    sys.exit()
+
+# Persistent surface the newest camera frame is copied into
+camera_surface = CameraSurface(camera_capture, (WIDTH, HEIGHT), stale_after=camera_stale_after)
+
+# Function to get the latest camera frame as a Pygame surface without blocking
+def get_camera_frame():
+    return camera_surface.get()
 
 # Font for rendering score
 font = pygame.font.Font(None, 48)
 
+# Plain background used whenever no camera frame is available
+background = pygame.Surface((WIDTH, HEIGHT)).convert()
+background.fill(BLACK)
+renderer = DirtyRenderer(screen, background, enabled=dirty_rendering)
+
 # Game loop
 clock = pygame.time.Clock()
+timer = FrameTimer(print_report=print_timings, trace_path=profile_trace)
+overlay = ProfilerOverlay(timer)
+stepper = FixedTimestep(tick_rate)
+flap = False
 
 while True:
+    timer.start()
     for event in pygame.event.get():
+        overlay.handle_event(event)
         if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
+            quit_game()
 
     keys = pygame.key.get_pressed()
     if keys[pygame.K_ESCAPE]:
-        pygame.quit()
-        sys.exit()
+        quit_game()
     if keys[pygame.K_RETURN]:
         reset_game()
+    timer.mark('input')
 
-    # Check for sound detection for jumping
-    if is_sound_detected():
-        bird_speed_y = jump_strength
-
-    # Update bird position
-    bird_speed_y += gravity
-    bird_y += bird_speed_y
-    bird_rect.y = bird_y
-
-    # Move pipes
-    for i in range(len(pipes)):
-        pipes[i] = (pipes[i][0] - pipe_speed, pipes[i][1])
-
-    # Add new pipes
-    if pipes[0][0] < -pipe_width:
-        pipes.pop(0)
-        new_pipe = create_pipe(pipes[-1][0] + pipe_distance)
-        pipes.append(new_pipe)
-
-    # Check for collision with pipes or screen boundaries
-    for pipe in pipes:
-        pipe_rect_top = pygame.Rect(pipe[0], 0, pipe_width, pipe[1])
-        pipe_rect_bottom = pygame.Rect(pipe[0], pipe[1] + pipe_gap, pipe_width, HEIGHT - pipe[1] - pipe_gap)
-        if bird_rect.colliderect(pipe_rect_top) or bird_rect.colliderect(pipe_rect_bottom):
-            reset_game()
+    # Check for sound detection for jumping (kept until a physics tick uses it)
+    flap = is_sound_detected() or flap
+    timer.mark('audio')
 
-    if bird_y <= 0 or bird_y >= HEIGHT:
-        reset_game()
+    # Run as many physics ticks as real time calls for
+    ticks = stepper.advance()
+    for _ in range(ticks):
+        previous_bird_y = sim.bird_y
+        if sim.step(flap):
+            reset_game()
+        flap = False
+    timer.count('skipped frames', max(ticks - 1, 0))
+    timer.mark('sim')
 
-    # Increase score when the bird passes through pipes
-    for pipe in pipes:
-        if pipe[0] + pipe_width < bird_x and not pipe[0] + pipe_width < bird_x - pipe_speed:
-            score += 1
+    # Draw between the last two physics states
+    alpha = stepper.alpha
+    bird_rect.y = int(lerp(previous_bird_y, sim.bird_y, alpha))
+    pipe_lag = int(pipe_speed * (1 - alpha))  # Pipes were this much further right one tick ago
 
     # Get camera frame and use it as the background
     camera_frame = get_camera_frame()
-    if camera_frame is not None:
-        screen.blit(camera_frame, (0, 0))
+    timer.mark('camera')
 
     # Draw pipes
-    for pipe in pipes:
-        pipe_rect_top = pygame.Rect(pipe[0], 0, pipe_width, pipe[1])
-        pipe_rect_bottom = pygame.Rect(pipe[0], pipe[1] + pipe_gap, pipe_width, HEIGHT - pipe[1] - pipe_gap)
-        pygame.draw.rect(screen, PIPE_COLOR, pipe_rect_top)
-        pygame.draw.rect(screen, PIPE_COLOR, pipe_rect_bottom)
+    for i, ((pipe_rect_top, pipe_rect_bottom), (pipe_x, pipe_height)) in enumerate(zip(pipe_rects, sim.pipes)):
+        pipe_rect_top.x = pipe_x + pipe_lag
+        pipe_rect_top.height = pipe_height
+        pipe_rect_bottom.x = pipe_x + pipe_lag
+        pipe_rect_bottom.y = pipe_height + pipe_gap
+        pipe_rect_bottom.height = HEIGHT - pipe_height - pipe_gap
+        renderer.rect(('pipe_top', i), PIPE_COLOR, pipe_rect_top)
+        renderer.rect(('pipe_bottom', i), PIPE_COLOR, pipe_rect_bottom)
 
     # Draw the bird
-    pygame.draw.ellipse(screen, YELLOW, bird_rect)
+    renderer.ellipse('bird', YELLOW, bird_rect)
 
     # Draw score
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    screen.blit(score_text, (10, 10))
+    score_text = text_cache.render(font, f"Score: {sim.score}", WHITE)  # Only re-rendered when the score changes
+    renderer.blit('score', score_text, (10, 10), sim.score)
 
-    # Update display
-    pygame.display.flip()
+    # Draw the profiler overlay (F3)
+    overlay_surface = overlay.update()
+    if overlay_surface is not None:
+        renderer.blit('profiler', overlay_surface, (10, 50), overlay.version)
+    timer.mark('draw')
+
+    # Update display (the camera backdrop changes every pixel, so it always flips)
+    renderer.present(camera_frame)
+    timer.mark('flip')
 
     # Cap the frame rate
     clock.tick(60)
-
-# Release the camera on exit
-camera.release()
+    timer.end_frame()
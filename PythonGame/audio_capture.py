@@ -0,0 +1,249 @@
+import abc
+import argparse
+import threading
+import time
+import wave
+
+import numpy as np
+
+from audio_analysis import SILENCE, OnsetDetector
+
+# Audio settings shared by the games
+RATE = 44100
+BLOCK_SIZE = 512  # ~12 ms per block, so a sound reaches the game sooner
+
+AUDIO_SOURCE_HELP = "mic (default), tone, null, or a .wav / .npy file to play as the microphone"
+
+
+class AudioSource(abc.ABC):
+    """Something that delivers int16 sample blocks to a callback.
+
+    ``start(push, rate, block_size)`` must return straight away; blocks are
+    then passed to ``push`` from the source's own thread until ``stop()``.
+    """
+
+    @abc.abstractmethod
+    def start(self, push, rate, block_size):
+        pass
+
+    def stop(self):
+        pass
+
+
+class NullAudioSource(AudioSource):
+    """Delivers nothing, so the game just sees silence."""
+
+    def start(self, push, rate, block_size):
+        pass
+
+
+class PyAudioSource(AudioSource):
+    """The default input device, through PyAudio's stream callback.
+
+    The device is opened on a background thread, since opening it can take a
+    while on some hosts and the game shouldn't wait for it. If it can't be
+    opened the game carries on in silence. If ``stop()`` is called before it
+    has opened, the opening thread closes the device again itself.
+    """
+
+    def __init__(self, device_index=None):
+        self.device_index = device_index
+        self.audio = None
+        self.stream = None
+        self.thread = None
+        self.push = None
+        self.lock = threading.Lock()  # Guards the hand-off of audio and stream
+        self.stopping = threading.Event()
+
+    def start(self, push, rate, block_size):
+        self.push = push
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._open, args=(rate, block_size), name='audio-open', daemon=True)
+        self.thread.start()
+
+    def _open(self, rate, block_size):
+        audio = stream = None
+        try:
+            import pyaudio
+            self.pa_continue = pyaudio.paContinue
+            self.pa_complete = pyaudio.paComplete
+            audio = pyaudio.PyAudio()
+            stream = audio.open(format=pyaudio.paInt16, channels=1, rate=rate, input=True,
+                                input_device_index=self.device_index,
+                                frames_per_buffer=block_size, stream_callback=self._callback)
+            stream.start_stream()
+        except Exception as e:
+            print(f"Microphone unavailable ({e}); continuing without audio")
+        with self.lock:
+            if not self.stopping.is_set():
+                self.audio, self.stream = audio, stream
+                return
+        # stop() has already run and won't see this device, so close it here
+        self._close(audio, stream)
+
+    def stop(self):
+        with self.lock:
+            self.stopping.set()
+            audio, stream = self.audio, self.stream
+            self.audio = self.stream = None
+        self._close(audio, stream)
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    @staticmethod
+    def _close(audio, stream):
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+        if audio is not None:
+            audio.terminate()
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if self.stopping.is_set():  # A device that opened after stop(), about to be closed
+            return (None, self.pa_complete)
+        self.push(np.frombuffer(in_data, dtype=np.int16))
+        return (None, self.pa_continue)
+
+
+class ArraySource(AudioSource):
+    """Plays a NumPy array of int16 samples as if it were being recorded.
+
+    One block is pushed per block period from a background thread, looping
+    over the array unless ``loop`` is False.
+    """
+
+    def __init__(self, samples, loop=True):
+        self.samples = np.asarray(samples, dtype=np.int16).ravel()
+        self.loop = loop
+        self.running = False
+        self.thread = None
+
+    def start(self, push, rate, block_size):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, args=(push, rate, block_size),
+                                       name='audio-playback', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self, push, rate, block_size):
+        samples = self.samples
+        blocks = len(samples) // block_size
+        period = block_size / rate
+        next_time = time.perf_counter()
+        i = 0
+        while self.running and blocks:
+            if i == blocks:
+                if not self.loop:
+                    break
+                i = 0
+            push(samples[i * block_size:(i + 1) * block_size])
+            i += 1
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class WavSource(ArraySource):
+    """Plays a 16-bit WAV file (first channel only) as the microphone."""
+
+    def __init__(self, path, loop=True):
+        super().__init__(load_wav(path), loop)
+
+
+def load_wav(path, rate=RATE):
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        if wav.getframerate() != rate:
+            raise ValueError(f"{path}: expected {rate} Hz, got {wav.getframerate()} Hz")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        return samples[::wav.getnchannels()]
+
+
+def tone_bursts(rate=RATE, seconds=10.0, every=0.5, length=0.15, amplitude=12000,
+                frequency=440.0, noise=200, seed=0):
+    # Quiet background noise with a loud tone burst every ``every`` seconds,
+    # as int16 samples
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, noise, int(rate * seconds))
+    t = np.arange(int(rate * length)) / rate
+    burst = amplitude * np.sin(2 * np.pi * frequency * t)
+    for start in np.arange(every / 2, seconds - length, every):
+        i = int(start * rate)
+        samples[i:i + len(burst)] += burst
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+def audio_source(spec):
+    # Build a source from a --audio value. Used as an argparse type, so bad
+    # values raise ArgumentTypeError and become a usage error, not a traceback.
+    if spec == 'mic':
+        return PyAudioSource()
+    if spec == 'null':
+        return NullAudioSource()
+    if spec == 'tone':
+        return ArraySource(tone_bursts())
+    try:
+        if spec.endswith('.wav'):
+            return WavSource(spec)
+        if spec.endswith('.npy'):
+            return ArraySource(np.load(spec))
+    except (OSError, ValueError, EOFError, wave.Error) as e:
+        raise argparse.ArgumentTypeError(f"can't read audio file '{spec}': {e}")
+    raise argparse.ArgumentTypeError(f"Unknown audio source '{spec}'. Use {AUDIO_SOURCE_HELP}")
+
+
+class MicCapture:
+    """Microphone capture that never blocks the game loop.
+
+    The source (PyAudio by default) delivers blocks on its own thread. Each
+    block is analysed exactly once there by an OnsetDetector, so the game
+    only has to read ``features``.
+
+    Onsets last a single block, which is shorter than a frame, so they are
+    also counted: a game compares ``onset_count`` with the count it last saw
+    to get every onset exactly once, and ``last_onset`` holds the features of
+    the newest one.
+
+    There is a single writer (the audio thread) and every result is published
+    with one attribute assignment, so readers need no lock.
+    """
+
+    def __init__(self, source=None, rate=RATE, block_size=BLOCK_SIZE, detector=None):
+        self.source = source if source is not None else PyAudioSource()
+        self.rate = rate
+        self.block_size = block_size
+        self.detector = detector if detector is not None else OnsetDetector(rate, block_size)
+        self.features = SILENCE
+        self.onset_count = 0
+        self.last_onset = SILENCE
+
+    def start(self):
+        self.source.start(self.push, self.rate, self.block_size)
+        return self
+
+    def stop(self):
+        self.source.stop()
+
+    def push(self, samples):
+        # A short block (the end of a file) is padded so the detector always
+        # compares spectra of the same size
+        if len(samples) != self.block_size:
+            block = np.zeros(self.block_size, dtype=np.int16)
+            n = min(len(samples), self.block_size)
+            block[:n] = samples[:n]
+            samples = block
+
+        # Replace the tuple in one assignment so readers never see a mix of blocks
+        features = self.detector.process(samples)
+        self.features = features
+        if features.onset:
+            self.last_onset = features
+            self.onset_count += 1  # Published last, after last_onset
@@ -0,0 +1,338 @@
+"""Headless benchmarks for the game loops.
+
+Examples:
+
+    python benchmarks/bench.py
+    python benchmarks/bench.py flappy --frames 1200
+    python benchmarks/bench.py --save benchmarks/baselines/laptop.json
+    python benchmarks/bench.py --compare benchmarks/baselines/laptop.json
+
+Each game script runs unmodified under SDL's dummy video driver, with
+``--audio tone`` (generated tone bursts; pass ``--audio`` a 16-bit 44.1 kHz
+WAV or a .npy array to use your own) and ``--camera synthetic``, so no
+devices are needed.
+
+Every game is run in up to three passes, each after ``--warmup`` frames:
+
+    throughput   frame cap lifted and exactly one physics tick per frame
+        ticks_per_sec          ticks per second spent in the sim phase
+        frames_per_sec         rendered frames per wall-clock second
+    allocations  the same, under tracemalloc
+        alloc_bytes_per_frame  memory a frame allocates above its starting point
+        growth_bytes_per_frame memory still held at the end of each frame
+    latency      as played: 60 FPS cap and real-time physics (mic games only)
+        jump_latency_p50_ms    from a loud audio block being captured to the
+        jump_latency_p95_ms    end of the frame whose physics jumped on it
+
+``--save`` writes the results as a JSON baseline; ``--compare`` prints the
+change against one and exits with status 1 if any metric got worse by more
+than ``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import runpy
+import sys
+import time
+import tracemalloc
+
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GAME_DIR)
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+
+import audio_capture
+import fixed_timestep
+import flappy_sim
+import frame_timer
+import pingpong_sim
+
+GAMES = {
+    'flappy': 'FlappyBird.py',
+    'pingpong-mic': 'PingPongMic.py',
+    'pingpong-keys': 'PingPongKeys.py',
+}
+
+# Command line each game is started with
+GAME_ARGS = {
+    'flappy': lambda args: ['--audio', args.audio, '--camera', 'synthetic'],
+    'pingpong-mic': lambda args: ['--audio', args.audio],
+    'pingpong-keys': lambda args: [],
+}
+
+# Games that listen to the microphone, and so get a latency pass
+MIC_GAMES = {'flappy', 'pingpong-mic'}
+
+# Peak of a block that starts a sound, as the latency pass measures it; kept
+# independent of the games' own detector
+ONSET_PEAK = 1000
+
+# Metrics where a bigger number is better; for the rest smaller is better
+HIGHER_IS_BETTER = {'ticks_per_sec', 'frames_per_sec'}
+
+# Differences smaller than this never count as a regression, so metrics that
+# sit near zero don't flap between runs
+NOISE_FLOOR = {
+    'alloc_bytes_per_frame': 1024,
+    'growth_bytes_per_frame': 256,
+    'jump_latency_p50_ms': 2.0,
+    'jump_latency_p95_ms': 2.0,
+}
+
+
+class Run:
+    """Measurements for one run of one game, collected through the patches."""
+
+    def __init__(self, mode, frames, warmup):
+        self.mode = mode
+        self.frames = frames
+        self.warmup = warmup
+        self.trace_allocations = mode == 'allocations'
+        self.frame = 0
+        self.start_time = None
+        self.end_time = None
+        self.ticks = 0
+        self.sim_ms = 0.0
+        self.mic = None
+        self.jump_time = None  # Time of the latest tick that jumped
+        self.onsets_seen = 0
+        self.latencies = []
+        self.frame_memory = 0
+        self.alloc_bytes = 0
+        self.growth_bytes = 0
+
+    @property
+    def measuring(self):
+        return self.frame >= self.warmup
+
+    def frame_started(self):
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            self.frame_memory = tracemalloc.get_traced_memory()[0]
+
+    def tick(self, jumped):
+        if self.measuring:
+            self.ticks += 1
+        if jumped:
+            self.jump_time = time.perf_counter()
+
+    def frame_ended(self, spans):
+        now = time.perf_counter()
+        if self.trace_allocations and self.measuring:
+            current, peak = tracemalloc.get_traced_memory()
+            self.alloc_bytes += peak - self.frame_memory
+            self.growth_bytes += current - self.frame_memory
+        if self.measuring:
+            self.sim_ms += spans.get('sim', 0.0)
+
+        # Loud blocks the game has jumped on since they were captured
+        if self.mic is not None:
+            onsets = self.mic.loud_times
+            while self.onsets_seen < len(onsets):
+                onset = onsets[self.onsets_seen]
+                if self.jump_time is None or self.jump_time < onset:
+                    break
+                if self.measuring:
+                    self.latencies.append((now - onset) * 1000)
+                self.onsets_seen += 1
+
+        self.frame += 1
+        if self.frame == self.warmup:
+            self.start_time = now
+        elif self.frame == self.warmup + self.frames:
+            self.end_time = now
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    def results(self):
+        results = {}
+        if self.mode == 'throughput':
+            results['ticks_per_sec'] = self.ticks / (self.sim_ms / 1000) if self.sim_ms else 0.0
+            results['frames_per_sec'] = self.frames / (self.end_time - self.start_time)
+        elif self.mode == 'allocations':
+            results['alloc_bytes_per_frame'] = self.alloc_bytes / self.frames
+            results['growth_bytes_per_frame'] = self.growth_bytes / self.frames
+        elif self.latencies:
+            results['jump_latency_p50_ms'] = float(np.percentile(self.latencies, 50))
+            results['jump_latency_p95_ms'] = float(np.percentile(self.latencies, 95))
+        return results
+
+
+class UncappedClock:
+    def tick(self, framerate=0):
+        return 0
+
+    def get_fps(self):
+        return 0.0
+
+
+class LockstepTimestep(fixed_timestep.FixedTimestep):
+    # One tick per frame whatever the wall clock says, so an uncapped loop
+    # does a full frame of work every frame
+    def advance(self):
+        self.alpha = 1.0
+        return 1
+
+
+def patch(run):
+    # Swap in measuring subclasses where the game scripts import them from.
+    # Returns a function that undoes it.
+    class BenchMic(audio_capture.MicCapture):
+        # Logs when each loud block arrives after a quiet one
+        def start(self):
+            run.mic = self
+            self.loud_times = []
+            self.loud = False
+            return super().start()
+
+        def push(self, samples):
+            super().push(samples)
+            loud = self.features.peak > ONSET_PEAK
+            if loud and not self.loud:
+                self.loud_times.append(time.perf_counter())
+            self.loud = loud
+
+    class BenchTimer(frame_timer.FrameTimer):
+        def start(self):
+            super().start()
+            run.frame_started()
+
+        def end_frame(self):
+            run.frame_ended(self.current)
+            super().end_frame()
+
+    def measured(sim_class):
+        class BenchSim(sim_class):
+            def step(self, *args, **kwargs):
+                # FlappySim.step(flap) and PingPongSim.step(jump_speed, ...)
+                jump = args[0] if args else None
+                run.tick(jump is not None and jump is not False)
+                return super().step(*args, **kwargs)
+        return BenchSim
+
+    replacements = [
+        (audio_capture, 'MicCapture', BenchMic),
+        (frame_timer, 'FrameTimer', BenchTimer),
+        (flappy_sim, 'FlappySim', measured(flappy_sim.FlappySim)),
+        (pingpong_sim, 'PingPongSim', measured(pingpong_sim.PingPongSim)),
+    ]
+    if run.mode != 'latency':
+        replacements.append((pygame.time, 'Clock', UncappedClock))
+        replacements.append((fixed_timestep, 'FixedTimestep', LockstepTimestep))
+
+    originals = [(module, name, getattr(module, name)) for module, name, _ in replacements]
+    for module, name, value in replacements:
+        setattr(module, name, value)
+
+    def restore():
+        for module, name, value in originals:
+            setattr(module, name, value)
+    return restore
+
+
+def run_game(game, mode, argv, frames, warmup):
+    run = Run(mode, frames, warmup)
+    restore = patch(run)
+    script = os.path.join(GAME_DIR, GAMES[game])
+    saved_argv = sys.argv
+    sys.argv = [script] + argv
+    if run.trace_allocations:
+        tracemalloc.start()
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit:
+        pass  # The game quits through sys.exit() once the run posts QUIT
+    finally:
+        if run.trace_allocations:
+            tracemalloc.stop()
+        if run.mic is not None:
+            run.mic.stop()
+        sys.argv = saved_argv
+        restore()
+    return run.results()
+
+
+def benchmark(game, args):
+    argv = GAME_ARGS[game](args)
+    results = run_game(game, 'throughput', argv, args.frames, args.warmup)
+    results.update(run_game(game, 'allocations', argv, args.frames, args.warmup))
+    if game in MIC_GAMES and args.latency_seconds > 0:
+        results.update(run_game(game, 'latency', argv, int(args.latency_seconds * 60), args.warmup))
+    return results
+
+
+def compare(baseline, results, tolerance):
+    # Print every metric against the baseline; returns the regressions
+    regressions = []
+    for game, metrics in results.items():
+        old_metrics = baseline.get(game, {})
+        for name, new in metrics.items():
+            old = old_metrics.get(name)
+            if old is None:
+                continue
+            change = (new - old) / abs(old) if old else 0.0
+            worse = old - new if name in HIGHER_IS_BETTER else new - old
+            regressed = worse > abs(old) * tolerance + NOISE_FLOOR.get(name, 0)
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{game:<14} {name:<24} {old:12.2f} -> {new:12.2f} ({change:+.1%}){flag}")
+            if regressed:
+                regressions.append((game, name))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the game loops headlessly.')
+    parser.add_argument('games', nargs='*', metavar='game',
+                        help=f"Games to run: {', '.join(GAMES)} (default: all)")
+    parser.add_argument('--frames', type=int, default=3000, help='Measured frames per throughput pass')
+    parser.add_argument('--warmup', type=int, default=60, help='Frames to run before measuring')
+    parser.add_argument('--audio', default='tone', help='WAV or .npy fixture to use as microphone input')
+    parser.add_argument('--latency-seconds', type=float, default=5.0,
+                        help='Length of the real-time latency pass (0 to skip it)')
+    parser.add_argument('--save', help='Write the results to this JSON baseline')
+    parser.add_argument('--compare', help='Compare the results with this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Relative change that counts as a regression')
+    args = parser.parse_args()
+    for game in args.games:
+        if game not in GAMES:
+            parser.error(f"unknown game '{game}'. Choose from: {', '.join(GAMES)}")
+
+    results = {}
+    for game in args.games or list(GAMES):
+        results[game] = benchmark(game, args)
+        line = ' | '.join(f"{name} {value:.1f}" for name, value in results[game].items())
+        print(f"{game}: {line}", flush=True)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        baseline = {
+            'machine': {
+                'platform': platform.platform(),
+                'python': platform.python_version(),
+                'pygame': pygame.version.ver,
+                'frames': args.frames,
+                'latency_seconds': args.latency_seconds,
+            },
+            'results': results,
+        }
+        with open(args.save, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline['results'], results, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pygame
+
+CAMERA_SOURCE_HELP = "an IP webcam URL, a camera index such as 0, a video file, synthetic, or null"
+
+
+class FrameSource:
+    """Something that produces BGR frames, with the cv2.VideoCapture interface.
+
+    ``open()`` may block (connecting to a stream), so CameraCapture calls it
+    from its decode thread rather than the game loop. ``read(image)`` returns
+    ``(ok, frame)`` and may reuse ``image`` as the output buffer. Sources with
+    ``reconnect`` set are reopened when they fail or drop.
+    """
+
+    reconnect = False
+
+    def open(self):
+        return True
+
+    def read(self, image=None):
+        return False, None
+
+    def release(self):
+        pass
+
+
+class NullFrameSource(FrameSource):
+    """No camera; the game keeps its plain background."""
+
+    def open(self):
+        return False
+
+
+class OpenCVSource(FrameSource):
+    """A webcam, stream URL or video file, through cv2.VideoCapture.
+
+    Connecting and reading both give up after ``timeout`` seconds, so an
+    unreachable or stalled stream fails instead of hanging the decode thread
+    on OpenCV's much longer network defaults.
+    """
+
+    reconnect = True
+
+    def __init__(self, target, timeout=5.0):
+        self.target = target
+        self.timeout = timeout
+        self.capture = None
+
+    def __str__(self):
+        return str(self.target)
+
+    def open(self):
+        timeout_ms = int(self.timeout * 1000)
+        self.capture = cv2.VideoCapture(self.target, cv2.CAP_ANY, [
+            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+            cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms,
+        ])
+        return self.capture.isOpened()
+
+    def read(self, image=None):
+        return self.capture.read(image)
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+
+class SyntheticSource(FrameSource):
+    """Generated frames (a moving gradient) played from memory at ``fps``."""
+
+    def __init__(self, size=(640, 480), fps=30, frame_count=30):
+        self.size = size
+        self.fps = fps
+        self.frames = []
+        self.index = 0
+        self.next_time = 0.0
+
+        width, height = size
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+        for i in range(frame_count):
+            shift = 255 * i / frame_count
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[..., 0] = (x + shift) % 256
+            frame[..., 1] = y
+            frame[..., 2] = (x + y + shift) % 256
+            self.frames.append(frame)
+
+    def open(self):
+        self.next_time = time.perf_counter()
+        return True
+
+    def read(self, image=None):
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time + 1 / self.fps, time.perf_counter())
+
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+
+def frame_source(spec):
+    # Build a source from a --camera value
+    if spec == 'null':
+        return NullFrameSource()
+    if spec == 'synthetic':
+        return SyntheticSource()
+    if spec.isdigit():
+        return OpenCVSource(int(spec))  # Local camera index
+    return OpenCVSource(spec)
+
+
+class CameraCapture:
+    """Decodes camera frames on a background thread.
+
+    The producer reads, mirrors, resizes and converts each frame to RGB, then
+    keeps only the newest one. The game loop calls ``acquire()`` which returns
+    immediately with whatever frame is ready (or None), so a slow or stalled
+    MJPEG stream never holds up rendering.
+
+    The source is opened on the decode thread too, so the game shows its
+    first frames without waiting for the camera to connect. If it can't be
+    opened, or ``max_read_failures`` reads in a row fail (a dropped stream),
+    it is reopened after ``reconnect_delay`` seconds, doubling up to
+    ``max_reconnect_delay`` while it keeps failing. The last good frame stays
+    available to ``acquire()`` in the meantime.
+
+    ``decode_size`` is the (width, height) frames are resized to off the main
+    thread. Use something smaller than the screen on slow hardware and let the
+    caller scale the surface up.
+
+    Every stage writes into buffers allocated once up front. Finished frames go
+    into one of three RGB buffers (triple buffering): the producer always has
+    one to write into that is neither the newest frame nor the one the game is
+    currently copying from.
+    """
+
+    def __init__(self, source, decode_size, reconnect_delay=0.5, max_reconnect_delay=8.0,
+                 max_read_failures=5):
+        self.source = source
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_read_failures = max_read_failures
+        self.decode_size = decode_size
+        width, height = decode_size
+        self.raw = None  # Reused by source.read() once the stream size is known
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.flipped = np.empty((height, width, 3), dtype=np.uint8)
+        self.buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(3)]
+
+        self.lock = threading.Lock()  # Only guards the buffer indices below
+        self.back = 0
+        self.ready = None
+        self.reading = None
+        self.frame_id = 0
+        self.last_frame_time = None  # perf_counter() when the newest frame was decoded
+
+        # Allocation accounting: buffers made up front vs. frame buffers that
+        # had to be allocated while running (see _reused)
+        self.frames_decoded = 0
+        self.setup_bytes = self.resized.nbytes + self.flipped.nbytes + sum(b.nbytes for b in self.buffers)
+        self.bytes_allocated = 0
+
+        self.connected = False
+        self.reconnects = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name='camera-decode', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        # Only the decode thread touches the source, and it releases it on its
+        # way out. open() and read() can block for the source's timeout, so
+        # don't wait that long here: a thread still blocked releases the
+        # source as soon as the call returns and it sees stopping.
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _run(self):
+        try:
+            self._connect()
+        finally:
+            self.source.release()
+
+    def _connect(self):
+        delay = self.reconnect_delay
+        failed_before = False
+        while not self.stopping.is_set():
+            if self.source.open():
+                self.connected = True
+                if failed_before:
+                    print("Camera connected")
+                decoded = self._decode()
+                self.connected = False
+                if self.stopping.is_set() or not self.source.reconnect:
+                    return
+                self.source.release()
+                print("Camera stream lost; reconnecting")
+                if decoded:
+                    delay = self.reconnect_delay  # It was working, so start the backoff over
+            else:
+                if not self.source.reconnect:
+                    return
+                if not failed_before:
+                    print(f"Camera unavailable ({self.source}); retrying in the background")
+            failed_before = True
+
+            # Exponential backoff; stop() interrupts the wait
+            self.stopping.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+            self.reconnects += 1
+
+    def _decode(self):
+        # Decode until the stream fails or stop() is called. Returns the
+        # number of frames decoded.
+        decoded = 0
+        failures = 0
+        while not self.stopping.is_set():
+            ret, frame = self.source.read(self.raw)
+            if not ret:
+                failures += 1
+                if failures >= self.max_read_failures:
+                    break
+                # Stream hiccup: back off briefly instead of spinning
+                time.sleep(0.01)
+                continue
+            failures = 0
+            if frame is not self.raw:
+                # First frame, or the stream changed size and OpenCV had to reallocate
+                if self.raw is None:
+                    self.setup_bytes += frame.nbytes
+                else:
+                    self.bytes_allocated += frame.nbytes
+                self.raw = frame
+
+            # Resize, flip so it's not mirrored, and convert to RGB (OpenCV uses BGR)
+            resized = self._reused(cv2.resize(frame, self.decode_size, dst=self.resized), self.resized)
+            flipped = self._reused(cv2.flip(resized, 1, dst=self.flipped), self.flipped)
+            back = self.buffers[self.back]
+            rgb = self._reused(cv2.cvtColor(flipped, cv2.COLOR_BGR2RGB, dst=back), back)
+            if rgb is not back:
+                np.copyto(back, rgb)
+
+            with self.lock:
+                self.ready = self.back
+                self.frame_id += 1
+                self.back = next(i for i in range(3) if i != self.ready and i != self.reading)
+            self.last_frame_time = time.perf_counter()
+            self.frames_decoded += 1
+            decoded += 1
+        return decoded
+
+    def _reused(self, result, buffer):
+        # OpenCV quietly returns a new array when a dst= buffer doesn't fit,
+        # so every result is checked and any replacement is counted
+        if result is not buffer:
+            self.bytes_allocated += result.nbytes
+        return result
+
+    def acquire(self):
+        # (frame_id, rgb_array) of the newest decoded frame, or None.
+        # The array stays valid until release() is called.
+        with self.lock:
+            if self.ready is None:
+                return None
+            self.reading = self.ready
+            return self.frame_id, self.buffers[self.ready]
+
+    def release(self):
+        with self.lock:
+            self.reading = None
+
+
+class CameraSurface:
+    """Copies decoded frames into one persistent Surface for blitting.
+
+    The RGB frame is written straight into the Surface's pixels through
+    ``pygame.surfarray.pixels3d``; when the decode size differs from the
+    screen it is scaled into a second persistent Surface. Nothing is
+    allocated per frame once both surfaces exist.
+
+    While the stream is down the last good frame keeps being returned, until
+    it is older than ``stale_after`` seconds (never, if None).
+    """
+
+    def __init__(self, capture, screen_size, stale_after=None):
+        self.capture = capture
+        self.screen_size = screen_size
+        self.stale_after = stale_after
+        self.surface = pygame.Surface(capture.decode_size).convert()
+        self.scaled = None
+        if capture.decode_size != screen_size:
+            self.scaled = pygame.Surface(screen_size).convert()
+        self.frame_id = 0
+        self.frames_shown = 0
+        self.bytes_allocated = 0  # Surfaces pygame had to allocate after setup
+
+    def get(self):
+        # The camera frame to draw, or None for the plain background
+        last_frame_time = self.capture.last_frame_time
+        if (self.stale_after is not None and last_frame_time is not None
+                and time.perf_counter() - last_frame_time > self.stale_after):
+            return None
+
+        latest = self.capture.acquire()
+        if latest is None:
+            return None
+
+        frame_id, frame_rgb = latest
+        if frame_id != self.frame_id:
+            # pixels3d is (width, height, 3); the transpose is just a view
+            pixels = pygame.surfarray.pixels3d(self.surface)
+            np.copyto(pixels, frame_rgb.transpose(1, 0, 2))
+            del pixels  # Unlock the surface so it can be blitted
+            if self.scaled is not None:
+                scaled = pygame.transform.scale(self.surface, self.screen_size, self.scaled)
+                if scaled is not self.scaled:
+                    self.bytes_allocated += scaled.get_bytesize() * scaled.get_width() * scaled.get_height()
+                    self.scaled = scaled
+            self.frame_id = frame_id
+            self.frames_shown += 1
+        self.capture.release()
+        return self.scaled if self.scaled is not None else self.surface
+
+    def bytes_per_frame(self):
+        # Frame-sized buffers and surfaces allocated after setup, found by
+        # checking every output buffer that was passed in was the one used,
+        # averaged over the frames decoded so far. Should stay at zero unless
+        # the stream changes size. Small per-call objects (such as the
+        # pixels3d view) are not counted; bench.py's tracemalloc pass covers
+        # those.
+        allocated = self.capture.bytes_allocated + self.bytes_allocated
+        return allocated / max(self.capture.frames_decoded, 1)
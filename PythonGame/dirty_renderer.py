@@ -0,0 +1,106 @@
+import pygame
+
+RECT = 0
+ELLIPSE = 1
+BLIT = 2
+
+
+class DirtyRenderer:
+    """Redraws only what changed and updates only those parts of the display.
+
+    Each frame the game describes its sprites with ``rect()``, ``ellipse()``
+    and ``blit()``, giving every sprite a stable key. ``present()`` compares
+    them with the previous frame: a sprite that moved or changed dirties both
+    its old and new rect, and a sprite that disappeared dirties its old rect.
+    The background is restored under each dirty rect and the sprites touching
+    it are redrawn clipped to it, in order, so the result matches a full
+    redraw; only those rects are passed to ``pygame.display.update``.
+
+    Pass a ``backdrop`` surface to ``present()`` (the camera feed) and the
+    frame is drawn in full and flipped instead, since every pixel changes.
+    With ``enabled=False`` every frame is drawn in full, as before.
+    """
+
+    def __init__(self, screen, background, enabled=True):
+        self.screen = screen
+        self.background = background
+        self.enabled = enabled
+        self.sprites = []
+        self.previous = {}  # key -> (rect, version) drawn last frame
+        self.full_redraw = True
+
+    def set_background(self, background):
+        self.background = background
+        self.full_redraw = True
+
+    def rect(self, key, color, rect):
+        self.sprites.append((key, RECT, color, rect, color))
+
+    def ellipse(self, key, color, rect):
+        self.sprites.append((key, ELLIPSE, color, rect, color))
+
+    def blit(self, key, surface, pos, version=None):
+        # ``version`` identifies the surface contents; when it is unchanged and
+        # the position is the same, the blit is skipped
+        rect = surface.get_rect(topleft=pos)
+        self.sprites.append((key, BLIT, surface, rect, version))
+
+    def _draw(self, kind, source, rect):
+        if kind == RECT:
+            pygame.draw.rect(self.screen, source, rect)
+        elif kind == ELLIPSE:
+            pygame.draw.ellipse(self.screen, source, rect)
+        else:
+            self.screen.blit(source, rect)
+
+    def present(self, backdrop=None):
+        sprites = self.sprites
+        self.sprites = []
+
+        if backdrop is not None or not self.enabled or self.full_redraw:
+            self.screen.blit(backdrop if backdrop is not None else self.background, (0, 0))
+            for _, kind, source, rect, _ in sprites:
+                self._draw(kind, source, rect)
+            pygame.display.flip()
+            self.previous = {key: (rect.copy(), version) for key, _, _, rect, version in sprites}
+            # After a backdrop frame the next dirty frame has to repaint the
+            # plain background everywhere
+            self.full_redraw = backdrop is not None
+            return
+
+        previous = self.previous
+        current = {}
+        dirty = []
+        for key, _, _, rect, version in sprites:
+            current[key] = (rect.copy(), version)
+            before = previous.pop(key, None)
+            if before is None:
+                dirty.append(rect)
+            elif before[0] != rect or before[1] != version:
+                # Old and new positions; one rect when they overlap
+                if before[0].colliderect(rect):
+                    dirty.append(before[0].union(rect))
+                else:
+                    dirty.append(before[0])
+                    dirty.append(rect)
+        # Sprites that disappeared since last frame
+        for old_rect, _ in previous.values():
+            dirty.append(old_rect)
+        self.previous = current
+
+        if not dirty:
+            return
+
+        # Repaint each area clipped to it: a sprite drawn in full would also
+        # cover the sprites above it outside the area, which aren't redrawn
+        screen = self.screen
+        background = self.background
+        clip = screen.get_clip()
+        for area in dirty:
+            screen.set_clip(area)
+            screen.blit(background, area, area)
+            for _, kind, source, rect, _ in sprites:
+                if rect.colliderect(area):
+                    self._draw(kind, source, rect)
+        screen.set_clip(clip)
+        pygame.display.update(dirty)
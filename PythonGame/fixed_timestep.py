@@ -0,0 +1,48 @@
+import time
+
+
+class FixedTimestep:
+    """Fixed-rate physics clock for a variable-rate render loop.
+
+    Each frame ``advance()`` adds the real time since the last frame to an
+    accumulator and returns how many whole physics ticks are due. The game runs
+    that many ticks and renders once, blending the last two physics states by
+    ``alpha`` (0..1, how far real time is into the next tick). A slow frame
+    therefore costs rendered frames, not game speed.
+
+    Catch-up is capped at ``max_frame_time`` seconds per frame so one very
+    long stall (a window drag, a debugger pause) doesn't make the game fast
+    forward.
+
+    ``clock`` returns the time in seconds; tests pass a fake one.
+    """
+
+    def __init__(self, tick_rate=60, max_frame_time=0.25, clock=time.perf_counter):
+        self.dt = 1.0 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.clock = clock
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.last = None
+
+    def advance(self):
+        now = self.clock()
+        if self.last is None:
+            self.last = now - self.dt
+        frame_time = min(now - self.last, self.max_frame_time)
+        self.last = now
+
+        self.accumulator += frame_time
+        ticks = int(self.accumulator / self.dt)
+        self.accumulator -= ticks * self.dt
+        self.alpha = self.accumulator / self.dt
+        return ticks
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.last = None
+
+
+def lerp(previous, current, alpha):
+    return previous + (current - previous) * alpha
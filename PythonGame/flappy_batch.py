@@ -0,0 +1,122 @@
+import numpy as np
+
+
+class BatchFlappySim:
+    """Thousands of FlappySim games stepped together with NumPy.
+
+    State is kept as structure-of-arrays: one entry per game for the bird and
+    an (N, 3) pair of arrays for each game's pipe queue, the same three-pipe
+    queue that ``FlappySim`` keeps. Every constant can be a scalar or an array
+    with one value per game, so a single batch can cover many difficulty
+    settings at once.
+
+    Games that crash stop advancing (``alive`` goes False) until they are
+    reset, which makes ``ticks`` the survival time of each game.
+    """
+
+    def __init__(self, n, width=1920, height=1080, seed=None, bird_size=30, bird_x=200,
+                 gravity=0.2, jump_strength=-5, pipe_width=80, pipe_gap=200,
+                 pipe_distance=600, pipe_speed=5):
+        self.n = n
+        self.width = width
+        self.height = height
+        self.bird_size = self._per_game(bird_size, np.int64)
+        self.bird_x = self._per_game(bird_x, np.int64)
+        self.gravity = self._per_game(gravity, np.float64)
+        self.jump_strength = self._per_game(jump_strength, np.float64)
+        self.pipe_width = self._per_game(pipe_width, np.int64)
+        self.pipe_gap = self._per_game(pipe_gap, np.int64)
+        self.pipe_distance = self._per_game(pipe_distance, np.int64)
+        self.pipe_speed = self._per_game(pipe_speed, np.int64)
+        self.rng = np.random.default_rng(seed)
+
+        self.bird_y = np.empty(n, dtype=np.float64)
+        self.bird_speed_y = np.empty(n, dtype=np.float64)
+        self.pipe_x = np.empty((n, 3), dtype=np.int64)
+        self.pipe_height = np.empty((n, 3), dtype=np.int64)
+        self.score = np.empty(n, dtype=np.int64)
+        self.ticks = np.empty(n, dtype=np.int64)
+        self.alive = np.empty(n, dtype=bool)
+        self.reset()
+
+    def _per_game(self, value, dtype):
+        return np.broadcast_to(np.asarray(value, dtype=dtype), (self.n,)).copy()
+
+    def _pipe_heights(self, games, count):
+        # Same range as FlappySim.create_pipe: randint(100, height - gap - 100)
+        high = self.height - self.pipe_gap[games] - 100
+        return self.rng.integers(100, high[:, None] + 1, size=(len(games), count))
+
+    def reset(self, mask=None):
+        games = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        self.bird_y[games] = self.height // 2
+        self.bird_speed_y[games] = 0
+        self.pipe_x[games] = self.width + np.arange(3) * self.pipe_distance[games, None]
+        self.pipe_height[games] = self._pipe_heights(games, 3)
+        self.score[games] = 0
+        self.ticks[games] = 0
+        self.alive[games] = True
+
+    def step(self, flap):
+        # Advance every live game one tick. ``flap`` is a bool per game.
+        # Returns the mask of games that crashed on this tick.
+        alive = self.alive
+        flap = np.asarray(flap, dtype=bool) & alive
+
+        # Update bird position
+        self.bird_speed_y[flap] = self.jump_strength[flap]
+        self.bird_speed_y += np.where(alive, self.gravity, 0.0)
+        self.bird_y += np.where(alive, self.bird_speed_y, 0.0)
+        self.ticks += alive
+
+        # Move pipes
+        self.pipe_x -= np.where(alive, self.pipe_speed, 0)[:, None]
+
+        # Add new pipes: shift the queue left and spawn one at the back
+        recycle = np.flatnonzero(alive & (self.pipe_x[:, 0] < -self.pipe_width))
+        if len(recycle):
+            self.pipe_x[recycle, :-1] = self.pipe_x[recycle, 1:]
+            self.pipe_height[recycle, :-1] = self.pipe_height[recycle, 1:]
+            self.pipe_x[recycle, -1] = self.pipe_x[recycle, -2] + self.pipe_distance[recycle]
+            self.pipe_height[recycle, -1] = self._pipe_heights(recycle, 1)[:, 0]
+
+        # Check for collision with pipes or screen boundaries
+        bird_x = self.bird_x[:, None]
+        # Rounded half away from zero, like FlappySim's rect_round
+        magnitude = np.abs(self.bird_y)
+        whole = np.floor(magnitude)
+        whole += magnitude - whole >= 0.5
+        bird_top = np.copysign(whole, self.bird_y).astype(np.int64)[:, None]
+        bird_bottom = bird_top + self.bird_size[:, None]
+        pipe_right = self.pipe_x + self.pipe_width[:, None]
+        overlap_x = (bird_x < pipe_right) & (bird_x + self.bird_size[:, None] > self.pipe_x)
+        outside_gap = (bird_top < self.pipe_height) | (bird_bottom > self.pipe_height + self.pipe_gap[:, None])
+        crashed = (overlap_x & outside_gap).any(axis=1)
+        crashed |= (self.bird_y <= 0) | (self.bird_y >= self.height)
+        crashed &= alive
+
+        # Increase score when the bird passes through pipes
+        passed = (pipe_right < bird_x) & ~(pipe_right < bird_x - self.pipe_speed[:, None])
+        self.score += np.where(alive & ~crashed, passed.sum(axis=1), 0)
+
+        self.alive &= ~crashed
+        return crashed
+
+    def autopilot(self, margin=20):
+        # Simple bot: flap when the bird has sunk below the next gap's centre.
+        # Handy for balance sweeps and as a baseline for trained bots.
+        pipe_right = self.pipe_x + self.pipe_width[:, None]
+        ahead = pipe_right >= self.bird_x[:, None]
+        next_pipe = ahead.argmax(axis=1)
+        gap_centre = self.pipe_height[np.arange(self.n), next_pipe] + self.pipe_gap / 2
+        return (self.bird_y + self.bird_size / 2 > gap_centre + margin) & (self.bird_speed_y >= 0)
+
+    def run(self, max_ticks, policy=None):
+        # Step until every game has crashed or max_ticks is reached.
+        # ``policy`` maps the sim to a flap mask; defaults to autopilot().
+        policy = policy or BatchFlappySim.autopilot
+        for _ in range(max_ticks):
+            if not self.alive.any():
+                break
+            self.step(policy(self))
+        return self.ticks
@@ -0,0 +1,111 @@
+import math
+import random
+
+
+def rect_round(value):
+    # The int pygame stores when a float is assigned to a Rect attribute:
+    # rounded half away from zero (137.5 -> 138, -0.5 -> -1)
+    magnitude = abs(value)
+    whole = math.floor(magnitude)
+    if magnitude - whole >= 0.5:
+        whole += 1
+    return int(math.copysign(whole, value))
+
+
+class FlappySim:
+    """Headless, deterministic Flappy Bird rules.
+
+    Physics, pipe spawning, collision and scoring from FlappyBird.py with no
+    display, audio or camera. Give it a seed and feed it one flap/no-flap
+    input per tick; the same seed and inputs always produce the same game.
+
+    Rects follow pygame semantics: the bird's y is rounded to an int before
+    collision the way ``bird_rect.y = bird_y`` rounds it (half away from
+    zero), and touching edges don't count as a hit.
+    """
+
+    def __init__(self, width=1920, height=1080, seed=None, bird_size=30, bird_x=200,
+                 gravity=0.2, jump_strength=-5, pipe_width=80, pipe_gap=200,
+                 pipe_distance=600, pipe_speed=5):
+        self.width = width
+        self.height = height
+        self.bird_size = bird_size
+        self.bird_x = bird_x
+        self.gravity = gravity
+        self.jump_strength = jump_strength
+        self.pipe_width = pipe_width
+        self.pipe_gap = pipe_gap
+        self.pipe_distance = pipe_distance
+        self.pipe_speed = pipe_speed
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.bird_y = self.height // 2
+        self.bird_speed_y = 0
+        self.pipes = [self.create_pipe(self.width + i * self.pipe_distance) for i in range(3)]
+        self.score = 0
+        self.ticks = 0
+
+    def create_pipe(self, pipe_x):
+        pipe_height = self.rng.randint(100, self.height - self.pipe_gap - 100)
+        return [pipe_x, pipe_height]
+
+    def step(self, flap):
+        # Advance one tick. Returns True if the bird crashed on this tick.
+        if flap:
+            self.bird_speed_y = self.jump_strength
+
+        # Update bird position
+        self.bird_speed_y += self.gravity
+        self.bird_y += self.bird_speed_y
+        self.ticks += 1
+
+        # Move pipes (each pipe is a mutable [x, height] pair updated in place)
+        pipes = self.pipes
+        pipe_speed = self.pipe_speed
+        pipe_width = self.pipe_width
+        for pipe in pipes:
+            pipe[0] -= pipe_speed
+
+        # Recycle the pipe that scrolled off the left as the new rightmost one
+        if pipes[0][0] < -pipe_width:
+            pipe = pipes.pop(0)
+            pipe[0] = pipes[-1][0] + self.pipe_distance
+            pipe[1] = self.rng.randint(100, self.height - self.pipe_gap - 100)
+            pipes.append(pipe)
+
+        # One pass over the pipes, left to right. Pipes behind the bird can only
+        # score, and the scan stops at the first pipe that starts past the bird,
+        # so normally only the one pipe at bird_x gets a collision check.
+        bird_x = self.bird_x
+        bird_top = rect_round(self.bird_y)
+        bird_right = bird_x + self.bird_size
+        passed = 0
+        for pipe_x, pipe_height in pipes:
+            pipe_right = pipe_x + pipe_width
+            if pipe_right < bird_x:
+                # Count a pipe on the tick the bird clears it
+                if not pipe_right < bird_x - pipe_speed:
+                    passed += 1
+                continue
+            if pipe_x >= bird_right:
+                break
+            if bird_x < pipe_right and (bird_top < pipe_height or bird_top + self.bird_size > pipe_height + self.pipe_gap):
+                return True
+
+        # Check for collision with screen boundaries
+        if self.bird_y <= 0 or self.bird_y >= self.height:
+            return True
+
+        # Increase score when the bird passes through pipes
+        self.score += passed
+        return False
+
+    def run(self, inputs):
+        # Play a sequence of flap/no-flap inputs until it ends or the bird
+        # crashes. Returns the number of ticks survived.
+        for flap in inputs:
+            if self.step(flap):
+                break
+        return self.ticks
@@ -0,0 +1,154 @@
+import json
+import time
+from collections import deque
+
+import pygame
+
+
+class FrameTimer:
+    """Per-frame profiler for a game loop.
+
+    Call ``start()`` at the top of the frame and ``mark(name)`` after each
+    phase; the time since the previous mark is charged to that named span.
+    ``end_frame()`` closes the frame.
+
+    The last ``window`` frames of every span are kept for percentiles (see
+    ``stats()``), which is what the on-screen overlay shows. With
+    ``print_report`` the average milliseconds per span are printed every
+    ``report_every`` frames, along with how many frames went over
+    ``budget_ms`` and any event counts recorded with ``count()``. With
+    ``trace_path`` every frame is also written as one JSON line.
+    """
+
+    def __init__(self, report_every=300, print_report=False, budget_ms=1000 / 60,
+                 window=600, trace_path=None):
+        self.report_every = report_every
+        self.print_report = print_report
+        self.budget_ms = budget_ms
+        self.window = window
+        self.spans = {}  # name -> deque of recent durations in ms
+        self.frame_times = deque(maxlen=window)  # Start-to-start, for FPS
+        self.current = {}
+        self.totals = {}
+        self.counts = {}
+        self.frame = 0
+        self.frames = 0
+        self.over_budget = 0
+        self.frame_start = None
+        self.last = 0.0
+        self.trace = open(trace_path, 'w') if trace_path else None
+
+    def start(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times.append((now - self.frame_start) * 1000)
+        self.frame_start = self.last = now
+        self.current = {}
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def end_frame(self):
+        self.frame += 1
+        self.frames += 1
+        for name, ms in self.current.items():
+            span = self.spans.get(name)
+            if span is None:
+                span = self.spans[name] = deque(maxlen=self.window)
+            span.append(ms)
+            self.totals[name] = self.totals.get(name, 0.0) + ms
+        work_ms = (self.last - self.frame_start) * 1000
+        if work_ms > self.budget_ms:
+            self.over_budget += 1
+
+        if self.trace is not None:
+            record = {'frame': self.frame, 't': round(self.frame_start, 6), 'work_ms': round(work_ms, 3),
+                      'spans': {name: round(ms, 3) for name, ms in self.current.items()}}
+            self.trace.write(json.dumps(record) + '\n')
+
+        if self.frames >= self.report_every:
+            if self.print_report:
+                print(self.report())
+            self.totals.clear()
+            self.counts.clear()
+            self.frames = 0
+            self.over_budget = 0
+
+    def report(self):
+        parts = [f"{name} {total / self.frames:.2f}" for name, total in self.totals.items()]
+        total = sum(self.totals.values()) / self.frames
+        line = f"ms/frame: {' | '.join(parts)} | total {total:.2f} | over budget {self.over_budget}/{self.frames}"
+        for name, value in self.counts.items():
+            line += f" | {name} {value}"
+        return line
+
+    def fps(self):
+        if not self.frame_times:
+            return 0.0
+        return 1000 * len(self.frame_times) / sum(self.frame_times)
+
+    def stats(self):
+        # {span: (p50, p95, p99)} in milliseconds over the recent window
+        result = {}
+        for name, span in self.spans.items():
+            ordered = sorted(span)
+            last = len(ordered) - 1
+            result[name] = tuple(ordered[int(last * p)] for p in (0.50, 0.95, 0.99))
+        return result
+
+    def close(self):
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+
+class ProfilerOverlay:
+    """On-screen table of FPS and p50/p95/p99 per span, toggled with a key.
+
+    The text is re-rendered every ``refresh_every`` frames rather than every
+    frame; ``version`` changes whenever it is, for the dirty renderer.
+    """
+
+    def __init__(self, timer, font=None, key=pygame.K_F3, refresh_every=30, color=(255, 255, 255)):
+        self.timer = timer
+        self.font = font or pygame.font.SysFont('monospace', 16)
+        self.key = key
+        self.refresh_every = refresh_every
+        self.color = color
+        self.visible = False
+        self.surface = None
+        self.version = 0
+        self.frames = 0
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == self.key:
+            self.visible = not self.visible
+            self.frames = 0
+
+    def update(self):
+        # Returns the overlay surface to draw, or None while hidden
+        if not self.visible:
+            return None
+        if self.surface is None or self.frames % self.refresh_every == 0:
+            self.surface = self.render()
+            self.version += 1
+        self.frames += 1
+        return self.surface
+
+    def render(self):
+        lines = [f"FPS {self.timer.fps():.1f}", "span      p50    p95    p99 ms"]
+        for name, (p50, p95, p99) in self.timer.stats().items():
+            lines.append(f"{name:<8}{p50:6.2f} {p95:6.2f} {p99:6.2f}")
+        line_height = self.font.get_linesize()
+        rendered = [self.font.render(line, True, self.color) for line in lines]
+        # Opaque, so redrawing part of it over itself never darkens anything
+        surface = pygame.Surface((max(r.get_width() for r in rendered) + 8, line_height * len(lines) + 8))
+        surface.fill((30, 30, 30))
+        for i, r in enumerate(rendered):
+            surface.blit(r, (4, 4 + i * line_height))
+        return surface
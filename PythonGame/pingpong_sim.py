@@ -0,0 +1,216 @@
+import random
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+import pygame
+
+
+class Platform:
+    """A static or moving platform.
+
+    Both kinds share one shape so the per-tick loops never branch on type:
+    a static platform is simply one with ``direction`` 0, which the movement
+    update skips.
+
+    ``id`` stays the same for the platform's whole life (its position does
+    not, for moving platforms), and per-platform game state such as
+    ``stepped_on`` lives here so it is dropped together with the platform.
+    """
+
+    __slots__ = ('id', 'rect', 'direction', 'initial_x', 'move_range', 'stepped_on')
+
+    def __init__(self, platform_id, rect, direction=0, move_range=0):
+        self.id = platform_id
+        self.rect = rect
+        self.direction = direction  # -1 or 1 for horizontal movement, 0 for static
+        self.initial_x = rect.x  # Spawn x, for movement range calculations
+        self.move_range = move_range
+        self.stepped_on = False  # Already counted towards the score
+
+    @property
+    def moving(self):
+        return self.direction != 0
+
+
+class PingPongSim:
+    """Headless PingPong rules shared by PingPongMic and PingPongKeys.
+
+    Ball physics, platform spawning and scrolling, collision and scoring with
+    no display or audio. Only ``pygame.Rect`` is used, as a geometry type, so
+    the rules behave exactly as they do on screen. Pass a seed to get the same
+    platform layout every time.
+
+    The ball is lost once it drops below the screen; ``step`` reports that so
+    sweeps and benchmarks can measure survival time.
+
+    Platforms are kept in a deque ordered by spawn x, with the spawn x values
+    in a parallel deque. Collision bisects that to find the few platforms that
+    can reach the ball's x-span, and platforms that fall a screen behind the
+    camera are evicted from the left end.
+    """
+
+    def __init__(self, width=1300, height=800, seed=None, ball_size=30, gravity=0.5,
+                 platform_width=100, platform_height=20, ground_height=50,
+                 platform_move_speed=2, platform_move_range=100):
+        self.width = width
+        self.height = height
+        self.ball_size = ball_size
+        self.gravity = gravity
+        self.platform_width = platform_width
+        self.platform_height = platform_height
+        self.ground_height = ground_height
+        self.platform_move_speed = platform_move_speed
+        self.platform_move_range = platform_move_range
+        self.rng = random.Random(seed)
+        self.platforms = deque()
+        self.next_platform_id = 0
+        self.platform_x = deque()  # Spawn x of each platform, same order as platforms
+        # Furthest a platform's left edge can be from its spawn x
+        self.platform_reach = platform_move_range + platform_move_speed
+        self.reset()
+
+    def reset(self):
+        # Ball properties
+        self.ball_speed_x = 0
+        self.ball_speed_y = 0
+        self.ball_rect = pygame.Rect(self.width // 2, self.height // 2, self.ball_size, self.ball_size)
+
+        # Ground properties
+        self.ground_rect = pygame.Rect(0, self.height - self.ground_height, self.width, self.ground_height)
+
+        # Platform properties
+        self.platforms.clear()
+        self.platform_x.clear()
+        for x in range(0, self.width + self.platform_width * 2, self.platform_width * 3):
+            y = self.height - self.ground_height - self.rng.randint(20, 150)
+            if self.rng.random() < 0.6:  # 60% chance to create a moving platform
+                self.append_platform(self.create_moving_platform(x, y), x)
+            else:
+                self.append_platform(self.create_platform(x, y), x)
+
+        self.camera_x = 0
+        self.is_jumping = False
+        self.score = 0
+        self.landed_platform = None  # Platform first landed on during the last tick, if any
+        self.ticks = 0
+
+        # Track the starting X position of the ball
+        self.start_x = self.ball_rect.x
+
+    def create_platform(self, x, y):
+        return Platform(self.new_platform_id(), pygame.Rect(x, y, self.platform_width, self.platform_height))
+
+    def create_moving_platform(self, x, y):
+        return Platform(self.new_platform_id(), pygame.Rect(x, y, self.platform_width, self.platform_height),
+                        self.rng.choice([-1, 1]), self.platform_move_range)
+
+    def new_platform_id(self):
+        self.next_platform_id += 1
+        return self.next_platform_id
+
+    def append_platform(self, platform, x):
+        # New platforms always spawn to the right of the last one, so both
+        # deques stay sorted by spawn x
+        self.platforms.append(platform)
+        self.platform_x.append(x)
+
+    def add_platform(self):
+        if len(self.platforms) > 0:
+            last_platform = self.platforms[-1]
+            new_x = last_platform.rect.right + self.rng.randint(150, 300)
+            new_y = self.height - self.ground_height - self.rng.randint(20, 150)
+            if self.rng.random() < 0.3:  # 30% chance to create a moving platform
+                self.append_platform(self.create_moving_platform(new_x, new_y), new_x)
+            else:
+                self.append_platform(self.create_platform(new_x, new_y), new_x)
+
+    def scroll_platforms(self):
+        speed = self.platform_move_speed
+        for platform in self.platforms:
+            direction = platform.direction
+            if direction:  # Static platforms have direction 0
+                # Move platform horizontally
+                rect = platform.rect
+                rect.x += direction * speed
+                # Reverse direction if platform is out of bounds
+                offset = rect.x - platform.initial_x
+                if offset < -platform.move_range or offset > platform.move_range:
+                    platform.direction = -direction
+
+        # Evict platforms that are a full screen behind the camera, from the left
+        platforms = self.platforms
+        while len(platforms) > 1:
+            if platforms[0].rect.right > self.camera_x - self.width:
+                break
+            platforms.popleft()
+            self.platform_x.popleft()
+
+    def platforms_near(self, left, right):
+        # Platforms whose rect can overlap the x-span [left, right)
+        reach = self.platform_reach
+        lo = bisect_right(self.platform_x, left - self.platform_width - reach)
+        hi = bisect_left(self.platform_x, right + reach)
+        platforms = self.platforms
+        return [platforms[i] for i in range(lo, hi)]
+
+    def update_score(self):
+        # Calculate distance traveled from the starting position
+        distance_moved = (self.ball_rect.x - self.start_x) // 10  # Dividing by 10 to scale the distance
+        self.score = max(distance_moved, 0)
+
+    def step(self, jump_speed=None, speed_x=None):
+        # Advance one tick. ``jump_speed`` starts a jump with that vertical
+        # speed, ``speed_x`` sets the horizontal speed (None keeps the current
+        # one). Returns True once the ball has dropped below the screen.
+        if jump_speed is not None:
+            self.ball_speed_y = jump_speed
+            self.is_jumping = True
+        if speed_x is not None:
+            self.ball_speed_x = speed_x
+
+        ball_rect = self.ball_rect
+
+        # Update ball position
+        self.ball_speed_y += self.gravity
+        ball_rect.x += self.ball_speed_x
+        ball_rect.y += self.ball_speed_y
+        self.ticks += 1
+        self.landed_platform = None  # Landing status only lasts one tick
+
+        # Move camera with ball
+        self.camera_x += self.ball_speed_x
+        self.scroll_platforms()
+
+        # Check collision with ground
+        if ball_rect.colliderect(self.ground_rect):
+            ball_rect.bottom = self.ground_rect.top
+            self.ball_speed_y = 0
+            self.is_jumping = False
+
+        # Check collision with the platforms near the ball
+        for platform in self.platforms_near(ball_rect.left - self.ball_size, ball_rect.right + self.ball_size):
+            platform_rect = platform.rect
+            if ball_rect.colliderect(platform_rect):
+                if self.ball_speed_y > 0:  # falling down
+                    ball_rect.bottom = platform_rect.top
+                    self.ball_speed_y = 0
+                    self.is_jumping = False
+                    if not platform.stepped_on:
+                        platform.stepped_on = True
+                        self.update_score()
+                        self.landed_platform = platform
+                elif self.ball_speed_y < 0:  # jumping up
+                    ball_rect.top = platform_rect.bottom
+                    self.ball_speed_y = 0
+
+                # Prevent falling off the sides of the platform
+                if self.ball_speed_x > 0 and ball_rect.right > platform_rect.right:
+                    ball_rect.right = platform_rect.right
+                elif self.ball_speed_x < 0 and ball_rect.left < platform_rect.left:
+                    ball_rect.left = platform_rect.left
+
+        # Add new platforms if needed
+        if self.platforms[-1].rect.right < self.camera_x + self.width:
+            self.add_platform()
+
+        return ball_rect.top > self.height
@@ -0,0 +1,228 @@
+"""Sweep gameplay constants with headless simulations.
+
+Examples:
+
+    python sweep.py flappy --param gravity=0.15:0.3:4 --param pipe_gap=160,200,240
+    python sweep.py pingpong --param platform_move_speed=1:4:4 --games 50 --out pp.csv
+
+Each ``--param name=...`` takes either a comma separated list of values or
+``lo:hi:steps`` for evenly spaced values; the sweep covers every combination.
+Integer constants only take whole numbers (a range's points are rounded).
+Configurations are split into chunks and run across a ProcessPoolExecutor,
+and each finished chunk is appended to the output file straight away.
+Output is Parquet (``{game}_sweep.parquet`` by default, needs pyarrow); give
+``--out`` a ``.csv`` name for CSV instead.
+"""
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+
+from flappy_batch import BatchFlappySim
+from pingpong_sim import PingPongSim
+
+# Tunable constants and their defaults, as set at the top of each game
+FLAPPY_PARAMS = {
+    'bird_size': 30,
+    'gravity': 0.2,
+    'jump_strength': -5.0,
+    'pipe_width': 80,
+    'pipe_gap': 200,
+    'pipe_distance': 600,
+    'pipe_speed': 5,
+}
+
+PINGPONG_PARAMS = {
+    'ball_size': 30,
+    'gravity': 0.5,
+    'base_jump_strength': -20.0,
+    'move_speed': 5,
+    'platform_width': 100,
+    'platform_height': 20,
+    'ground_height': 50,
+    'platform_move_speed': 2,
+    'platform_move_range': 100,
+}
+
+STAT_COLUMNS = ['games', 'mean_ticks', 'p10_ticks', 'p50_ticks', 'p90_ticks', 'survival_rate', 'mean_score']
+
+
+def parse_number(text, kind):
+    value = float(text)
+    if kind is int:
+        if not value.is_integer():
+            raise ValueError(f"'{text}' is not a whole number")
+        return int(value)
+    return value
+
+
+def parse_values(text, default):
+    kind = type(default)
+    if ':' in text:
+        lo, hi, steps = text.split(':')
+        values = np.linspace(parse_number(lo, kind), parse_number(hi, kind), int(steps))
+        if kind is int:
+            return sorted({int(round(v)) for v in values})
+        return [round(float(v), 6) for v in values]
+    return [parse_number(v, kind) for v in text.split(',')]
+
+
+def build_configs(defaults, param_args):
+    grid = {}
+    for arg in param_args:
+        name, _, text = arg.partition('=')
+        if name not in defaults:
+            raise SystemExit(f"Unknown parameter '{name}'. Choose from: {', '.join(defaults)}")
+        try:
+            grid[name] = parse_values(text, defaults[name])
+        except ValueError as e:
+            raise SystemExit(f"Bad values for {name} ('{text}'): {e}")
+
+    names = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        config = dict(defaults)
+        config.update(zip(names, values))
+        configs.append(config)
+    return configs
+
+
+def summarize(ticks, scores, max_ticks):
+    p10, p50, p90 = np.percentile(ticks, [10, 50, 90])
+    return {
+        'games': len(ticks),
+        'mean_ticks': float(np.mean(ticks)),
+        'p10_ticks': float(p10),
+        'p50_ticks': float(p50),
+        'p90_ticks': float(p90),
+        'survival_rate': float(np.mean(np.asarray(ticks) >= max_ticks)),
+        'mean_score': float(np.mean(scores)),
+    }
+
+
+def run_flappy_chunk(configs, games, max_ticks, width, height, seed):
+    # All configs in the chunk run in one batch, `games` games per config
+    n = len(configs) * games
+    constants = {name: np.repeat([c[name] for c in configs], games) for name in FLAPPY_PARAMS}
+    sim = BatchFlappySim(n, width, height, seed=seed, **constants)
+    sim.run(max_ticks)
+
+    ticks = sim.ticks.reshape(len(configs), games)
+    scores = sim.score.reshape(len(configs), games)
+    return [dict(config, **summarize(ticks[i], scores[i], max_ticks)) for i, config in enumerate(configs)]
+
+
+def run_pingpong_chunk(configs, games, max_ticks, width, height, seed):
+    rng = random.Random(seed)
+    rows = []
+    for config in configs:
+        sim_params = {k: v for k, v in config.items() if k not in ('base_jump_strength', 'move_speed')}
+        ticks, scores = [], []
+        for _ in range(games):
+            sim = PingPongSim(width, height, seed=rng.random(), **sim_params)
+            for _ in range(max_ticks):
+                # Bot player: shouts at a random volume whenever the ball has landed
+                jump_speed = None
+                if not sim.is_jumping:
+                    jump_speed = config['base_jump_strength'] * (rng.uniform(1000, 20000) / 10000)
+                if sim.step(jump_speed, config['move_speed']):
+                    break
+            ticks.append(sim.ticks)
+            scores.append(sim.score)
+        rows.append(dict(config, **summarize(ticks, scores, max_ticks)))
+    return rows
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    # One row group per finished chunk, so partial results survive a crash
+    def __init__(self, path, columns):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.columns = columns
+        self.writer = None
+        self.path = path
+        self.parquet = pyarrow.parquet
+
+    def write(self, rows):
+        table = self.pyarrow.table({c: [row[c] for row in rows] for c in self.columns})
+        if self.writer is None:
+            self.writer = self.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep gameplay constants with headless simulations.')
+    parser.add_argument('game', choices=['flappy', 'pingpong'])
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help='values to sweep: a,b,c or lo:hi:steps (repeatable)')
+    parser.add_argument('--games', type=int, default=100, help='games per configuration')
+    parser.add_argument('--max-ticks', type=int, default=3600, help='ticks before a game counts as survived')
+    parser.add_argument('--chunk-size', type=int, default=64, help='configurations per worker task')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--width', type=int)
+    parser.add_argument('--height', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='output file (.parquet or .csv)')
+    args = parser.parse_args(argv)
+
+    if args.game == 'flappy':
+        defaults, run_chunk, size = FLAPPY_PARAMS, run_flappy_chunk, (1920, 1080)
+    else:
+        defaults, run_chunk, size = PINGPONG_PARAMS, run_pingpong_chunk, (1300, 800)
+    width = args.width or size[0]
+    height = args.height or size[1]
+    out = args.out or f'{args.game}_sweep.parquet'
+
+    configs = build_configs(defaults, args.param)
+    chunks = [configs[i:i + args.chunk_size] for i in range(0, len(configs), args.chunk_size)]
+    columns = list(defaults) + STAT_COLUMNS
+    writer = ParquetWriter(out, columns) if out.endswith('.parquet') else CsvWriter(out, columns)
+
+    print(f"Sweeping {len(configs)} configurations x {args.games} games in {len(chunks)} chunks", file=sys.stderr)
+    start = time.perf_counter()
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(run_chunk, chunk, args.games, args.max_ticks, width, height, args.seed + i)
+                       for i, chunk in enumerate(chunks)]
+            for future in as_completed(futures):
+                rows = future.result()
+                writer.write(rows)
+                done += len(rows)
+                elapsed = time.perf_counter() - start
+                print(f"\r{done}/{len(configs)} configurations, {done / elapsed:.1f}/s", end='', file=sys.stderr)
+    finally:
+        writer.close()
+    print(f"\nWrote {out}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from audio_analysis import OnsetDetector
+from audio_capture import BLOCK_SIZE, RATE, tone_bursts
+
+QUIET = 80  # Blocks of room noise to settle the noise floor first
+
+
+def blocks(n, amplitude=0, noise=200, frequency=440.0, seed=0):
+    # ``n`` blocks of a sine tone over gaussian noise, as float samples
+    rng = np.random.default_rng(seed)
+    t = np.arange(n * BLOCK_SIZE) / RATE
+    return amplitude * np.sin(2 * np.pi * frequency * t) + rng.normal(0, noise, n * BLOCK_SIZE)
+
+
+def onsets(*parts, detector=None):
+    # Indexes of the blocks detected as onsets
+    samples = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    detector = detector or OnsetDetector(RATE, BLOCK_SIZE)
+    features = [detector.process(block) for block in samples.reshape(-1, BLOCK_SIZE)]
+    return [i for i, f in enumerate(features) if f.onset]
+
+
+def test_every_tone_burst_is_one_onset():
+    # tone_bursts() starts a burst every 0.5 s from 0.25 s: 20 in 10 s
+    samples = tone_bursts(seconds=10.0, every=0.5)
+    found = onsets(samples[:len(samples) // BLOCK_SIZE * BLOCK_SIZE])
+    starts = [int((0.25 + 0.5 * i) * RATE) // BLOCK_SIZE for i in range(20)]
+    assert len(found) == 20
+    assert all(0 <= block - start <= 1 for block, start in zip(found, starts))
+
+
+def test_loud_steady_noise_never_triggers():
+    assert onsets(blocks(900, noise=3000)) == []
+
+
+def test_sustained_tone_is_a_single_onset():
+    assert onsets(blocks(QUIET), blocks(260, amplitude=12000)) == [QUIET]
+
+
+def test_getting_louder_while_active_does_not_retrigger():
+    assert onsets(blocks(QUIET), blocks(40, amplitude=12000), blocks(40, amplitude=24000),
+                  blocks(40)) == [QUIET]
+
+
+@pytest.mark.parametrize('gap, expected', [(1, 1), (5, 1), (8, 2), (12, 2)])
+def test_refractory_period(gap, expected):
+    # Two 2-block bursts: the second only counts once the refractory time
+    # (0.1 s, 9 blocks) since the first has passed
+    burst = blocks(2, amplitude=12000)
+    found = onsets(blocks(QUIET), burst, blocks(gap), burst, blocks(40))
+    assert len(found) == expected
+    assert found[0] == QUIET
+
+
+def test_rearms_after_the_sound_stops():
+    tone = blocks(40, amplitude=12000)
+    assert onsets(blocks(QUIET), tone, blocks(20), tone, blocks(40)) == [QUIET, QUIET + 60]
+
+
+def test_loud_first_block():
+    # The first block only seeds the noise floor. A loud one is not an onset,
+    # and the floor falls back to the room within a few seconds.
+    detector = OnsetDetector(RATE, BLOCK_SIZE)
+    first = detector.process(np.full(BLOCK_SIZE, 8000, dtype=np.int16))
+    assert not first.onset and detector.floor == pytest.approx(8000)
+    found = onsets(blocks(260), blocks(10, amplitude=12000), blocks(40), detector=detector)
+    assert found == [260]
@@ -0,0 +1,47 @@
+import argparse
+
+import numpy as np
+import pytest
+
+from audio_capture import ArraySource, AudioSource, audio_source
+
+
+def parse(value):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--audio', type=audio_source)
+    return parser.parse_args(['--audio', value]).audio
+
+
+def test_files_and_names(tmp_path):
+    path = tmp_path / 'clap.npy'
+    np.save(path, np.zeros(1024, dtype=np.int16))
+    assert isinstance(parse(str(path)), ArraySource)
+    assert isinstance(parse('tone'), ArraySource)
+
+
+@pytest.mark.parametrize('name, contents', [
+    ('missing.wav', None),
+    ('missing.npy', None),
+    ('broken.wav', b'not a wav file'),
+    ('broken.npy', b'not an array'),
+    ('empty.wav', b''),
+    ('speaker', None),
+])
+def test_bad_values_are_usage_errors(tmp_path, capsys, name, contents):
+    path = tmp_path / name
+    if contents is not None:
+        path.write_bytes(contents)
+    with pytest.raises(SystemExit) as exit:
+        parse(str(path))
+    assert exit.value.code == 2
+    assert str(path) in capsys.readouterr().err
+
+
+def test_sources_must_implement_start():
+    class NoStart(AudioSource):
+        pass
+
+    with pytest.raises(TypeError):
+        AudioSource()
+    with pytest.raises(TypeError):
+        NoStart()
@@ -0,0 +1,147 @@
+import sys
+import threading
+import types
+
+import numpy as np
+
+from audio_capture import PyAudioSource
+from camera_capture import CameraCapture, FrameSource
+
+# Upper bound on any wait below; the events normally fire at once
+TIMEOUT = 5.0
+
+
+def in_background(function):
+    # stop() waits up to a second for a blocked thread; run it aside so the
+    # test can carry on as soon as it has signalled
+    thread = threading.Thread(target=function)
+    thread.start()
+    return thread
+
+
+class BlockingSource(FrameSource):
+    """A stream whose open() blocks until the test lets it connect."""
+
+    reconnect = True
+
+    def __init__(self, connect_at_once=False):
+        self.opening = threading.Event()
+        self.connect = threading.Event()
+        self.reading = threading.Event()
+        self.released = threading.Event()
+        if connect_at_once:
+            self.connect.set()
+        self.is_open = False
+        self.calls = []  # (call, thread name, open at the time)
+
+    def record(self, call):
+        self.calls.append((call, threading.current_thread().name, self.is_open))
+
+    def open(self):
+        self.opening.set()
+        assert self.connect.wait(TIMEOUT)
+        self.record('open')
+        self.is_open = True
+        return True
+
+    def read(self, image=None):
+        self.record('read')
+        self.reading.set()
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        self.record('release')
+        self.is_open = False
+        self.released.set()
+
+
+def test_camera_released_once_by_decode_thread_after_late_open():
+    source = BlockingSource()
+    capture = CameraCapture(source, (64, 48)).start()
+    assert source.opening.wait(TIMEOUT)
+    stopper = in_background(capture.stop)
+    assert capture.stopping.wait(TIMEOUT)
+    assert source.calls == []  # Still connecting; nothing released under it
+
+    source.connect.set()
+    assert source.released.wait(TIMEOUT)
+    stopper.join(TIMEOUT)
+    assert {name for _, name, _ in source.calls} == {'camera-decode'}
+    assert [call for call, _, _ in source.calls] == ['open', 'release']
+    assert not source.is_open
+
+
+def test_camera_stop_releases_running_source():
+    source = BlockingSource(connect_at_once=True)
+    capture = CameraCapture(source, (64, 48)).start()
+    assert source.reading.wait(TIMEOUT)
+    capture.stop()
+    assert source.released.is_set() and not source.is_open
+    calls = [call for call, _, _ in source.calls]
+    assert calls.count('release') == 1 and calls[-1] == 'release'
+    assert all(is_open for call, _, is_open in source.calls if call == 'read')
+
+
+class FakeStream:
+    def __init__(self, callback):
+        self.callback = callback
+        self.closed = False
+
+    def start_stream(self):
+        pass
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def fake_pyaudio(connect, opened):
+    # Stands in for the PyAudio device layer; open() blocks until ``connect``
+    # is set and each opened (audio, stream) pair is appended to ``opened``
+    class PyAudio:
+        terminated = False
+
+        def open(self, stream_callback, **kwargs):
+            assert connect.wait(TIMEOUT)
+            stream = FakeStream(stream_callback)
+            opened.append((self, stream))
+            return stream
+
+        def terminate(self):
+            self.terminated = True
+
+    return types.SimpleNamespace(PyAudio=PyAudio, paInt16=8, paContinue=0, paComplete=1)
+
+
+def test_late_microphone_is_closed(monkeypatch):
+    connect, opened, pushed = threading.Event(), [], []
+    monkeypatch.setitem(sys.modules, 'pyaudio', fake_pyaudio(connect, opened))
+    source = PyAudioSource()
+    source.start(pushed.append, 44100, 1024)
+    opener = source.thread
+    stopper = in_background(source.stop)
+    assert source.stopping.wait(TIMEOUT)
+
+    connect.set()  # The device finally opens, after stop()
+    opener.join(TIMEOUT)
+    stopper.join(TIMEOUT)
+    (audio, stream), = opened
+    assert stream.closed and audio.terminated
+    assert stream.callback(bytes(2048), 1024, None, 0) == (None, 1)
+    assert pushed == []
+
+
+def test_open_microphone_is_closed_by_stop(monkeypatch):
+    connect, opened, pushed = threading.Event(), [], []
+    connect.set()
+    monkeypatch.setitem(sys.modules, 'pyaudio', fake_pyaudio(connect, opened))
+    source = PyAudioSource()
+    source.start(pushed.append, 44100, 1024)
+    source.thread.join(TIMEOUT)
+    (audio, stream), = opened
+    assert stream.callback(bytes(2048), 1024, None, 0) == (None, 0)
+    source.stop()
+    assert stream.closed and audio.terminated
+    assert len(pushed) == 1
@@ -0,0 +1,93 @@
+import random
+
+import pygame
+import pytest
+
+from dirty_renderer import DirtyRenderer
+
+SIZE = (200, 150)
+
+
+@pytest.fixture
+def screen():
+    pygame.init()
+    yield pygame.display.set_mode(SIZE)
+    pygame.quit()
+
+
+def make_background():
+    background = pygame.Surface(SIZE)
+    for x in range(0, SIZE[0], 10):
+        pygame.draw.line(background, (40, 40, 80), (x, 0), (x, SIZE[1]))
+    return background
+
+
+def full_redraw(background, sprites):
+    # What the frame should look like: background, then every sprite in order
+    surface = background.copy()
+    for _, kind, source, rect in sprites:
+        if kind == 'rect':
+            pygame.draw.rect(surface, source, rect)
+        elif kind == 'ellipse':
+            pygame.draw.ellipse(surface, source, rect)
+        else:
+            surface.blit(source, rect)
+    return surface
+
+
+def render(renderer, sprites):
+    for key, kind, source, rect in sprites:
+        if kind == 'rect':
+            renderer.rect(key, source, rect)
+        elif kind == 'ellipse':
+            renderer.ellipse(key, source, rect)
+        else:
+            renderer.blit(key, source, rect.topleft, version=id(source))
+    renderer.present()
+
+
+def assert_same_pixels(screen, expected):
+    assert pygame.image.tobytes(screen, 'RGB') == pygame.image.tobytes(expected, 'RGB')
+
+
+def test_lower_sprite_redraw_does_not_cover_upper_sprite(screen):
+    background = make_background()
+    renderer = DirtyRenderer(screen, background)
+    red, blue, green = (255, 0, 0), (0, 0, 255), (0, 255, 0)
+    for x in (10, 12):
+        sprites = [
+            ('a', 'rect', red, pygame.Rect(0, 0, 100, 100)),  # Static, under B
+            ('b', 'rect', blue, pygame.Rect(80, 80, 10, 10)),  # Static, outside C's area
+            ('c', 'rect', green, pygame.Rect(x, 10, 10, 10)),  # Moving
+        ]
+        render(renderer, sprites)
+    assert screen.get_at((85, 85))[:3] == blue
+    assert_same_pixels(screen, full_redraw(background, sprites))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_full_redraw_every_frame(screen, seed):
+    rng = random.Random(seed)
+    background = make_background()
+    renderer = DirtyRenderer(screen, background)
+    labels = [pygame.Surface((12, 8)) for _ in range(3)]
+    for i, label in enumerate(labels):
+        label.fill((80 * i, 200, 255 - 80 * i))
+
+    # Overlapping sprites in a fixed stacking order; some move, some come and go
+    kinds = ['rect', 'ellipse', 'blit'] * 4
+    rects = [pygame.Rect(rng.randrange(SIZE[0] - 40), rng.randrange(SIZE[1] - 40),
+                         rng.randint(5, 60), rng.randint(5, 60)) for _ in kinds]
+    colors = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in kinds]
+    for frame in range(120):
+        sprites = []
+        for i, kind in enumerate(kinds):
+            if rng.random() < 0.3:
+                rects[i].move_ip(rng.randint(-6, 6), rng.randint(-6, 6))
+            if rng.random() < 0.05:
+                continue  # Hidden this frame
+            source = labels[frame // 20 % 3] if kind == 'blit' else colors[i]
+            rect = source.get_rect(topleft=rects[i].topleft) if kind == 'blit' else rects[i].copy()
+            sprites.append((i, kind, source, rect))
+        render(renderer, sprites)
+        assert_same_pixels(screen, full_redraw(background, sprites))
@@ -0,0 +1,76 @@
+import pytest
+
+from fixed_timestep import FixedTimestep, lerp
+
+
+class FakeClock:
+    # Times and the 64 Hz tick are exact binary fractions, so no rounding
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def stepper(tick_rate=64, **kwargs):
+    clock = FakeClock()
+    return FixedTimestep(tick_rate, clock=clock, **kwargs), clock
+
+
+def test_first_frame_is_one_tick():
+    timestep, _ = stepper()
+    assert timestep.advance() == 1
+    assert timestep.alpha == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize('frame_time, ticks, alpha', [
+    (1 / 64, 1, 0.0),
+    (1 / 128, 0, 0.5),
+    (2.5 / 64, 2, 0.5),
+    (0.125, 8, 0.0),
+])
+def test_ticks_and_alpha(frame_time, ticks, alpha):
+    timestep, clock = stepper()
+    timestep.advance()
+    clock.now += frame_time
+    assert timestep.advance() == ticks
+    assert timestep.alpha == pytest.approx(alpha, abs=1e-9)
+
+
+def test_remainder_carries_over():
+    # 1.5 ticks per frame alternates 1 and 2 ticks, never losing any
+    timestep, clock = stepper()
+    timestep.advance()
+    ticks = []
+    for _ in range(8):
+        clock.now += 1.5 / 64
+        ticks.append(timestep.advance())
+        assert 0 <= timestep.alpha < 1
+    assert ticks == [1, 2] * 4
+
+
+def test_long_stall_is_capped():
+    timestep, clock = stepper(max_frame_time=0.25)
+    timestep.advance()
+    clock.now += 5.0  # A debugger pause
+    assert timestep.advance() == 16  # 0.25 s at 64 Hz
+    clock.now += 1 / 64
+    assert timestep.advance() == 1
+
+
+def test_reset_forgets_the_gap():
+    timestep, clock = stepper()
+    timestep.advance()
+    clock.now += 1 / 128
+    timestep.advance()
+    clock.now += 3.0
+    timestep.reset()
+    assert timestep.advance() == 1
+    assert timestep.alpha == pytest.approx(0.0)
+
+
+def test_lerp():
+    assert lerp(10, 20, 0.0) == 10
+    assert lerp(10, 20, 1.0) == 20
+    assert lerp(10, 20, 0.25) == pytest.approx(12.5)
+    assert lerp(20, 10, 0.5) == pytest.approx(15)
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from flappy_batch import BatchFlappySim
+from flappy_sim import FlappySim
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+class SeededBatch(BatchFlappySim):
+    """A batch whose pipe heights come from one random.Random per game, drawn
+    in the same order FlappySim draws them, so each game can be replayed by
+    a scalar sim with the same seed."""
+
+    def __init__(self, seeds, **params):
+        self.rngs = [random.Random(seed) for seed in seeds]
+        super().__init__(len(seeds), WIDTH, HEIGHT, **params)
+
+    def _pipe_heights(self, games, count):
+        high = self.height - self.pipe_gap[games] - 100
+        return np.array([[self.rngs[g].randint(100, int(h)) for _ in range(count)]
+                         for g, h in zip(games, high)], dtype=np.int64)
+
+
+@pytest.mark.parametrize('pipe_gap', [200, [160, 200, 240, 280] * 5])
+def test_batch_matches_scalar_sims(pipe_gap):
+    seeds = list(range(20))
+    batch = SeededBatch(seeds, pipe_gap=pipe_gap)
+    gaps = np.broadcast_to(pipe_gap, (len(seeds),))
+    sims = [FlappySim(WIDTH, HEIGHT, seed=seed, pipe_gap=int(gap)) for seed, gap in zip(seeds, gaps)]
+    alive = [True] * len(sims)
+    rng = np.random.default_rng(0)
+    for tick in range(3000):
+        # The batch autopilot with some noise, so runs end at different ticks
+        flap = batch.autopilot(margin=rng.integers(-40, 40, size=len(sims)))
+        crashed = batch.step(flap)
+        for i, sim in enumerate(sims):
+            if not alive[i]:
+                continue
+            assert sim.step(bool(flap[i])) == crashed[i], f'game {i}, tick {tick}'
+            alive[i] = not crashed[i]
+            assert batch.bird_y[i] == sim.bird_y
+            assert batch.pipe_x[i].tolist() == [x for x, _ in sim.pipes]
+            assert batch.pipe_height[i].tolist() == [h for _, h in sim.pipes]
+            if alive[i]:
+                assert batch.score[i] == sim.score
+        if not any(alive):
+            break
+    assert batch.ticks.tolist() == [sim.ticks for sim in sims]
@@ -0,0 +1,107 @@
+import random
+
+import pygame
+import pytest
+
+from flappy_sim import FlappySim, rect_round
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+class OriginalFlappy:
+    """The game rules exactly as FlappyBird.py had them before FlappySim:
+    tuples for pipes, new pygame.Rects every tick and Rect.colliderect."""
+
+    def __init__(self, seed, bird_size=30, bird_x=200, gravity=0.2, jump_strength=-5,
+                 pipe_width=80, pipe_gap=200, pipe_distance=600, pipe_speed=5):
+        self.rng = random.Random(seed)
+        self.bird_size = bird_size
+        self.bird_x = bird_x
+        self.gravity = gravity
+        self.jump_strength = jump_strength
+        self.pipe_width = pipe_width
+        self.pipe_gap = pipe_gap
+        self.pipe_distance = pipe_distance
+        self.pipe_speed = pipe_speed
+        self.bird_y = HEIGHT // 2
+        self.bird_speed_y = 0
+        self.bird_rect = pygame.Rect(bird_x, self.bird_y, bird_size, bird_size)
+        self.pipes = [self.create_pipe(WIDTH + i * pipe_distance) for i in range(3)]
+        self.score = 0
+
+    def create_pipe(self, pipe_x):
+        return (pipe_x, self.rng.randint(100, HEIGHT - self.pipe_gap - 100))
+
+    def step(self, flap):
+        if flap:
+            self.bird_speed_y = self.jump_strength
+        self.bird_speed_y += self.gravity
+        self.bird_y += self.bird_speed_y
+        self.bird_rect.y = self.bird_y
+
+        self.pipes = [(x - self.pipe_speed, h) for x, h in self.pipes]
+        if self.pipes[0][0] < -self.pipe_width:
+            self.pipes.pop(0)
+            self.pipes.append(self.create_pipe(self.pipes[-1][0] + self.pipe_distance))
+
+        for x, h in self.pipes:
+            top = pygame.Rect(x, 0, self.pipe_width, h)
+            bottom = pygame.Rect(x, h + self.pipe_gap, self.pipe_width, HEIGHT - h - self.pipe_gap)
+            if self.bird_rect.colliderect(top) or self.bird_rect.colliderect(bottom):
+                return True
+        if self.bird_y <= 0 or self.bird_y >= HEIGHT:
+            return True
+
+        for x, h in self.pipes:
+            if x + self.pipe_width < self.bird_x and not x + self.pipe_width < self.bird_x - self.pipe_speed:
+                self.score += 1
+        return False
+
+
+def autopilot(game, rng):
+    # Flap when the bird sinks towards the bottom of the next gap, with some
+    # noise so runs graze the pipe edges
+    upcoming = [h for x, h in game.pipes if x + game.pipe_width >= game.bird_x]
+    gap_bottom = upcoming[0] + game.pipe_gap
+    return game.bird_y + game.bird_size > gap_bottom - rng.randint(10, 60) and game.bird_speed_y > 0
+
+
+def test_rect_round_matches_pygame_assignment():
+    rect = pygame.Rect(0, 0, 1, 1)
+    rng = random.Random(0)
+    values = [rng.uniform(-2000, 2000) for _ in range(20000)] + [i / 2 for i in range(-400, 400)]
+    for value in values:
+        rect.y = value
+        assert rect_round(value) == rect.y, value
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_matches_original_rules(seed):
+    original = OriginalFlappy(seed)
+    sim = FlappySim(WIDTH, HEIGHT, seed=seed)
+    rng = random.Random(seed)
+    for tick in range(5000):
+        flap = autopilot(original, rng)
+        crashed = original.step(flap)
+        assert sim.step(flap) == crashed, f'tick {tick}'
+        assert sim.bird_y == original.bird_y
+        assert [tuple(pipe) for pipe in sim.pipes] == original.pipes
+        if crashed:
+            break
+        assert sim.score == original.score
+
+
+@pytest.mark.parametrize('fraction', [0.25, 0.5, 0.6, 0.75])
+@pytest.mark.parametrize('edge', ['top', 'bottom'])
+def test_fractional_y_at_pipe_edge(edge, fraction):
+    # A bird hovering a fraction of a pixel above a pipe edge: whether it hits
+    # depends on how the float y becomes an int Rect coordinate
+    params = dict(gravity=0, pipe_speed=0)
+    original = OriginalFlappy(0, **params)
+    sim = FlappySim(WIDTH, HEIGHT, seed=0, **params)
+    height = 400
+    edge_y = height if edge == 'top' else height + original.pipe_gap - original.bird_size
+    for game in (original, sim):
+        game.pipes[0] = (game.bird_x, height) if game is original else [game.bird_x, height]
+        game.bird_y = edge_y - 1 + fraction
+    assert sim.step(False) == original.step(False)
@@ -0,0 +1,181 @@
+import random
+
+import pytest
+
+import pygame
+
+from pingpong_sim import PingPongSim
+
+
+class LinearScanSim(PingPongSim):
+    """PingPongSim without the x index: every platform is checked for
+    collision and the platform list is filtered in full, as before."""
+
+    def platforms_near(self, left, right):
+        return list(self.platforms)
+
+    def scroll_platforms(self):
+        camera_x = self.camera_x
+        self.camera_x = float('-inf')  # Keep everything from the indexed eviction
+        super().scroll_platforms()
+        self.camera_x = camera_x
+        kept = [(p, x) for p, x in zip(self.platforms, self.platform_x) if p.rect.right > camera_x - self.width]
+        self.platforms.clear()
+        self.platform_x.clear()
+        for platform, x in kept:
+            self.append_platform(platform, x)
+
+
+class OriginalPingPong:
+    """The rules as PingPongMic had them before PingPongSim: static platforms
+    are Rects, moving ones dicts, and every platform is checked each tick.
+
+    One deliberate difference: a landed platform is remembered by identity
+    rather than by its (left, top), so a moving platform only scores once,
+    as it does in PingPongSim.
+    """
+
+    def __init__(self, seed, width=1300, height=800):
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.ball_speed_x = 0
+        self.ball_speed_y = 0
+        self.ball_rect = pygame.Rect(width // 2, height // 2, 30, 30)
+        self.ground_rect = pygame.Rect(0, height - 50, width, 50)
+        self.platforms = []
+        for x in range(0, width + 100 * 2, 100 * 3):
+            y = height - 50 - self.rng.randint(20, 150)
+            if self.rng.random() < 0.6:
+                self.platforms.append(self.create_moving_platform(x, y))
+            else:
+                self.platforms.append(pygame.Rect(x, y, 100, 20))
+        self.camera_x = 0
+        self.is_jumping = False
+        self.stepped_on = {}  # id(rect) -> rect, which also keeps the id from being reused
+        self.score = 0
+        self.start_x = self.ball_rect.x
+
+    def create_moving_platform(self, x, y):
+        return {'rect': pygame.Rect(x, y, 100, 20), 'direction': self.rng.choice([-1, 1]),
+                'move_range': 100, 'initial_x': x}
+
+    def add_platform(self):
+        last = self.platforms[-1]
+        new_x = last['rect'].right + self.rng.randint(150, 300) if isinstance(last, dict) \
+            else last.right + self.rng.randint(150, 300)
+        new_y = self.height - 50 - self.rng.randint(20, 150)
+        if self.rng.random() < 0.3:
+            self.platforms.append(self.create_moving_platform(new_x, new_y))
+        else:
+            self.platforms.append(pygame.Rect(new_x, new_y, 100, 20))
+
+    def scroll_platforms(self):
+        kept = []
+        for platform in self.platforms:
+            if isinstance(platform, dict):
+                platform['rect'].x += platform['direction'] * 2
+                if platform['rect'].x < platform['initial_x'] - platform['move_range'] or \
+                        platform['rect'].x > platform['initial_x'] + platform['move_range']:
+                    platform['direction'] *= -1
+            rect = platform['rect'] if isinstance(platform, dict) else platform
+            if rect.right > self.camera_x - self.width:
+                kept.append(platform)
+        self.platforms = kept
+
+    def step(self, jump_speed=None, speed_x=None):
+        if jump_speed is not None:
+            self.ball_speed_y = jump_speed
+            self.is_jumping = True
+        if speed_x is not None:
+            self.ball_speed_x = speed_x
+        ball_rect = self.ball_rect
+        self.ball_speed_y += 0.5
+        ball_rect.x += self.ball_speed_x
+        ball_rect.y += self.ball_speed_y
+        self.camera_x += self.ball_speed_x
+        self.scroll_platforms()
+
+        if ball_rect.colliderect(self.ground_rect):
+            ball_rect.bottom = self.ground_rect.top
+            self.ball_speed_y = 0
+            self.is_jumping = False
+
+        for platform in self.platforms:
+            platform_rect = platform['rect'] if isinstance(platform, dict) else platform
+            if ball_rect.colliderect(platform_rect):
+                if self.ball_speed_y > 0:
+                    ball_rect.bottom = platform_rect.top
+                    self.ball_speed_y = 0
+                    self.is_jumping = False
+                    if id(platform_rect) not in self.stepped_on:
+                        self.stepped_on[id(platform_rect)] = platform_rect
+                        self.score = max((ball_rect.x - self.start_x) // 10, 0)
+                elif self.ball_speed_y < 0:
+                    ball_rect.top = platform_rect.bottom
+                    self.ball_speed_y = 0
+                if self.ball_speed_x > 0 and ball_rect.right > platform_rect.right:
+                    ball_rect.right = platform_rect.right
+                elif self.ball_speed_x < 0 and ball_rect.left < platform_rect.left:
+                    ball_rect.left = platform_rect.left
+
+        last = self.platforms[-1]
+        last_rect = last['rect'] if isinstance(last, dict) else last
+        if last_rect.right < self.camera_x + self.width:
+            self.add_platform()
+        return ball_rect.top > self.height
+
+
+def mic_inputs(rng):
+    # Like PingPongMic: a sound makes the ball jump, as high as it was loud,
+    # and move forward
+    if rng.random() < 0.05:
+        return -20 * rng.randint(1000, 15000) / 10000, 5
+    return None, None
+
+
+def key_inputs(rng, sim):
+    # Like PingPongKeys: arrow keys set the speed, space jumps from the ground
+    speed_x = rng.choice([-5, 0, 5, 5, 5]) if rng.random() < 0.1 else None
+    jump = -20 if not sim.is_jumping and rng.random() < 0.1 else None
+    return jump, speed_x
+
+
+def play(sims, seed, ticks=5000, keys=False):
+    # Step every sim with the same inputs; yields after each tick
+    rng = random.Random(seed)
+    for _ in range(ticks):
+        jump, speed_x = key_inputs(rng, sims[0]) if keys else mic_inputs(rng)
+        lost = [sim.step(jump, speed_x) for sim in sims]
+        yield lost
+        if lost[0]:
+            break
+
+
+@pytest.mark.parametrize('keys', [False, True])
+@pytest.mark.parametrize('seed', range(10))
+def test_index_matches_linear_scan(seed, keys):
+    indexed, linear = PingPongSim(seed=seed), LinearScanSim(seed=seed)
+    for lost in play([indexed, linear], seed, keys=keys):
+        assert lost[0] == lost[1]
+        assert indexed.ball_rect == linear.ball_rect
+        assert (indexed.ball_speed_x, indexed.ball_speed_y) == (linear.ball_speed_x, linear.ball_speed_y)
+        assert indexed.score == linear.score
+        assert landed_id(indexed) == landed_id(linear)
+
+
+def landed_id(sim):
+    return sim.landed_platform and sim.landed_platform.id
+
+
+@pytest.mark.parametrize('keys', [False, True])
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_original_rules(seed, keys):
+    sim, original = PingPongSim(seed=seed), OriginalPingPong(seed)
+    for lost in play([sim, original], seed, keys=keys):
+        assert lost[0] == lost[1]
+        assert sim.ball_rect == original.ball_rect
+        assert (sim.ball_speed_x, sim.ball_speed_y) == (original.ball_speed_x, original.ball_speed_y)
+        assert sim.score == original.score
+        assert [p.rect for p in sim.platforms if p.rect.right > sim.camera_x - sim.width] == \
+            [p['rect'] if isinstance(p, dict) else p for p in original.platforms]
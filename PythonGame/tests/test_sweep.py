@@ -0,0 +1,29 @@
+import pytest
+
+import sweep
+
+
+def test_parse_values():
+    assert sweep.parse_values('160,200,240', 200) == [160, 200, 240]
+    assert sweep.parse_values('2e2', 200) == [200]
+    assert sweep.parse_values('160:240:3', 200) == [160, 200, 240]
+    assert sweep.parse_values('160:170:4', 200) == [160, 163, 167, 170]
+    assert sweep.parse_values('0.1,0.25', 0.2) == [0.1, 0.25]
+    assert sweep.parse_values('0.1:0.3:3', 0.2) == [0.1, 0.2, 0.3]
+
+
+@pytest.mark.parametrize('text', ['2.5', '160,200.5', '160.5:240:3', 'wide'])
+def test_int_params_take_whole_numbers(text):
+    with pytest.raises(SystemExit, match='pipe_gap'):
+        sweep.build_configs(sweep.FLAPPY_PARAMS, [f'pipe_gap={text}'])
+
+
+def test_writes_parquet_by_default(tmp_path, monkeypatch):
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.chdir(tmp_path)
+    sweep.main(['flappy', '--param', 'pipe_gap=160,240', '--games', '4', '--max-ticks', '50',
+                '--workers', '1'])
+    table = pyarrow_parquet.read_table(tmp_path / 'flappy_sweep.parquet')
+    assert table.num_rows == 2
+    assert sorted(table.column('pipe_gap').to_pylist()) == [160, 240]
+    assert set(sweep.STAT_COLUMNS) <= set(table.column_names)
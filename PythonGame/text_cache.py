@@ -0,0 +1,36 @@
+from collections import OrderedDict
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces for the HUD.
+
+    Anti-aliased ``font.render`` is one of the most expensive calls in a
+    frame, but the HUD text only changes when the score does. Surfaces are
+    keyed by (text, font, color, antialias) and re-rasterized only on a miss;
+    the least recently used entry is evicted once ``max_size`` is reached.
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (text, font, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+# One cache shared by every game
+text_cache = TextCache()